@@ -1,12 +1,714 @@
 import chess
+import chess.polyglot
+import chess.syzygy
+import hashlib
+import json
+import logging
+import os
+import pickle
 import random
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MATE_SCORE = 100000
+# Оценки выше этой границы считаются матовыми (мат в N полуходов)
+MATE_BOUND = MATE_SCORE - 1000
+# Выигрыш по эндшпильным таблицам: ниже любого мата, выше любой оценки
+TB_WIN_SCORE = MATE_BOUND - 1000
+
+# Типы оценок в таблице транспозиций
+EXACT, LOWER, UPPER = 0, 1, 2
+
+MAX_PLY = 128
+
+# Приоритеты сортировки ходов
+PV_MOVE_SCORE = 4000000
+TT_MOVE_SCORE = 3000000
+CAPTURE_SCORE = 2000000
+PROMOTION_SCORE = 1900000
+KILLER_SCORES = (1800000, 1700000)
+# Проигрывающие по SEE взятия идут после всех тихих ходов
+BAD_CAPTURE_SCORE = -1000000
+
+# Запас для отсечения по дельте в поиске взятий
+DELTA_MARGIN = 200
+
+# Начальная полуширина окна стремления вокруг оценки прошлой итерации
+ASPIRATION_WINDOW = 50
+
+# Сокращения поздних ходов: сколько первых ходов перебирать без сокращения
+LMR_FULL_MOVES = 3
+
+# Запас для отсечения бесперспективных ходов на глубине 1 и 2
+FUTILITY_MARGINS = (0, 200, 500)
+
+# Через сколько узлов проверять время и сигналы остановки (степени двойки);
+# в режиме жесткого лимита - чаще
+CHECK_INTERVAL = 1024
+HARD_CHECK_INTERVAL = 256
+
+# Дебютная книга по умолчанию рядом с ботом
+DEFAULT_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'book.bin')
+
+# Веса позиционной оценки (настраиваются chess_tuner.py вместе с таблицами фигур)
+EVAL_WEIGHTS = {
+    'mobility': 5,
+    'king_back_rank': -30,
+    'king_edge': -20,
+    'check': -50,
+    'doubled_pawn': -10,
+    'isolated_pawn': -15,
+    'passed_pawn': 10,
+}
+# Множитель бонуса проходной пешки по ее горизонтали (считая от своей стороны)
+PASSED_RANK_FACTORS = (0, 1, 1, 2, 3, 5, 8, 0)
+# Настроенные веса оценки; если файл есть, бот загружает его при создании
+DEFAULT_PARAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_params.json')
+
+
+def castling_squares(board: chess.Board, move: chess.Move):
+    """Поля рокировки: (куда идет король, откуда и куда идет ладья)"""
+    rank = chess.square_rank(move.from_square) * 8
+    if board.is_kingside_castling(move):
+        return rank + 6, rank + 7, rank + 5
+    return rank + 2, rank, rank + 3
+
+
+def ep_captured_square(board: chess.Board, move: chess.Move):
+    """Поле пешки, взятой на проходе, или None"""
+    if move.to_square != board.ep_square or board.piece_type_at(move.from_square) != chess.PAWN:
+        return None
+    return move.to_square - 8 if board.turn == chess.WHITE else move.to_square + 8
+
+
+def center_bonus(square: int, value: float) -> float:
+    """Бонус за центральные поля для пешек и фигур"""
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    if 2 <= file <= 5 and 2 <= rank <= 5:
+        return 10 * value / 100
+    elif 3 <= file <= 4 and 3 <= rank <= 4:
+        return 20 * value / 100
+    return 0
+
+
+def see(board: chess.Board, move: chess.Move, piece_values: dict) -> float:
+    """Статический размен (SEE): материальный итог серии взятий на поле хода
+    для стороны, которая ходит. Учитываются рентгеновские атаки дальнобойных фигур."""
+    to_square = move.to_square
+    victim = board.piece_type_at(to_square)
+    occupied = board.occupied ^ chess.BB_SQUARES[move.from_square]
+    if victim is None:
+        ep_pawn = ep_captured_square(board, move)
+        if ep_pawn is not None:
+            victim = chess.PAWN
+            occupied ^= chess.BB_SQUARES[ep_pawn]
+    gains = [piece_values[victim] if victim else 0]
+    on_square = piece_values[board.piece_type_at(move.from_square)]
+    if move.promotion:
+        gains[0] += piece_values[move.promotion] - piece_values[chess.PAWN]
+        on_square = piece_values[move.promotion]
+
+    color = not board.turn
+    while True:
+        attackers = board.attackers_mask(color, to_square, occupied) & occupied
+        if not attackers:
+            break
+        # Бьет самая дешевая фигура
+        for piece_type in chess.PIECE_TYPES:
+            candidates = attackers & board.pieces_mask(piece_type, color)
+            if candidates:
+                break
+        square = chess.lsb(candidates)
+        if piece_type == chess.KING and board.attackers_mask(not color, to_square, occupied) & occupied:
+            # Король не может брать на защищенном поле
+            break
+        gains.append(on_square - gains[-1])
+        on_square = piece_values[piece_type]
+        occupied ^= chess.BB_SQUARES[square]
+        color = not color
+
+    # Каждая сторона может остановить размен, если продолжение невыгодно
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+    return gains[0]
+
+
+class Zobrist:
+    """Ключи Зобриста (совместимые с Polyglot) с инкрементальным обновлением"""
+
+    def __init__(self):
+        self.array = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+        self.hasher = chess.polyglot.ZobristHasher(self.array)
+
+    def piece_key(self, piece_type: int, color: bool, square: int) -> int:
+        return self.array[64 * ((piece_type - 1) * 2 + color) + square]
+
+    def pieces_key(self, board: chess.Board) -> int:
+        """Часть ключа, зависящая только от расстановки фигур"""
+        return self.hasher.hash_board(board)
+
+    def state_key(self, board: chess.Board) -> int:
+        """Часть ключа: рокировки, взятие на проходе и очередь хода"""
+        return (self.hasher.hash_castling(board) ^ self.hasher.hash_ep_square(board) ^
+                self.hasher.hash_turn(board))
+
+    def update_pieces_key(self, board: chess.Board, move: chess.Move, key: int) -> int:
+        """Новый ключ фигур после хода (вызывается ДО board.push)"""
+        from_square, to_square = move.from_square, move.to_square
+        color = board.turn
+        piece_type = board.piece_type_at(from_square)
+        key ^= self.piece_key(piece_type, color, from_square)
+
+        if piece_type == chess.KING and board.is_castling(move):
+            king_to, rook_from, rook_to = castling_squares(board, move)
+            return (key ^ self.piece_key(chess.KING, color, king_to) ^
+                    self.piece_key(chess.ROOK, color, rook_from) ^
+                    self.piece_key(chess.ROOK, color, rook_to))
+
+        key ^= self.piece_key(move.promotion or piece_type, color, to_square)
+
+        captured = board.piece_type_at(to_square)
+        if captured:
+            key ^= self.piece_key(captured, not color, to_square)
+        else:
+            ep_pawn = ep_captured_square(board, move)
+            if ep_pawn is not None:
+                key ^= self.piece_key(chess.PAWN, not color, ep_pawn)
+        return key
+
+    def __call__(self, board: chess.Board) -> int:
+        return self.pieces_key(board) ^ self.state_key(board)
+
+
+def _pawn_masks():
+    """Соседние вертикали и зоны проходной пешки (свои - на своей вертикали впереди)"""
+    adjacent = [(chess.BB_FILES[file - 1] if file > 0 else 0) | (chess.BB_FILES[file + 1] if file < 7 else 0)
+                for file in range(8)]
+    passed, ahead = ([], []), ([], [])
+    for color in chess.COLORS:
+        for square in chess.SQUARES:
+            file, rank = chess.square_file(square), chess.square_rank(square)
+            ranks = range(rank + 1, 8) if color == chess.WHITE else range(rank)
+            front = 0
+            for front_rank in ranks:
+                front |= chess.BB_RANKS[front_rank]
+            ahead[color].append(front & chess.BB_FILES[file])
+            passed[color].append(front & (chess.BB_FILES[file] | adjacent[file]))
+    return adjacent, passed, ahead
+
+
+ADJACENT_FILES, PASSED_MASKS, AHEAD_MASKS = _pawn_masks()
+
+
+def pawn_terms(white: int, black: int) -> tuple:
+    """Сдвоенные, изолированные и проходные (с множителем горизонтали) пешки:
+    разность белых и черных по битбордам пешек"""
+    doubled = isolated = passed = 0
+    for color, own, their, sign in ((chess.WHITE, white, black, 1), (chess.BLACK, black, white, -1)):
+        for file_mask in chess.BB_FILES:
+            count = chess.popcount(own & file_mask)
+            if count > 1:
+                doubled += sign * (count - 1)
+        for square in chess.scan_forward(own):
+            if not own & ADJACENT_FILES[chess.square_file(square)]:
+                isolated += sign
+            if not their & PASSED_MASKS[color][square] and not own & AHEAD_MASKS[color][square]:
+                rank = chess.square_rank(square)
+                passed += sign * PASSED_RANK_FACTORS[rank if color == chess.WHITE else 7 - rank]
+    return doubled, isolated, passed
+
+
+class PawnHashTable:
+    """Кэш пешечной структуры: ключ - только битборды пешек.
+
+    Пешки двигаются редко, поэтому в поиске почти все пробы - попадания,
+    и пешечные признаки обходятся листу почти бесплатно. Хранятся сами
+    признаки, а не оценка, так что смена весов кэш не портит.
+    """
+
+    def __init__(self, size: int = 1 << 14):
+        # Размер - степень двойки: индекс берется маской
+        self.size = size
+        self.entries = [None] * size
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, board: chess.Board) -> tuple:
+        white = board.pawns & board.occupied_co[chess.WHITE]
+        black = board.pawns & board.occupied_co[chess.BLACK]
+        index = hash((white, black)) & (self.size - 1)
+        entry = self.entries[index]
+        if entry is not None and entry[0] == white and entry[1] == black:
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        terms = pawn_terms(white, black)
+        self.entries[index] = (white, black, terms)
+        return terms
+
+    def hit_rate(self) -> float:
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+
+class EvalState:
+    """Материал и бонусы за центр, обновляемые при ходах в поиске.
+
+    Оценка хранится стеком (с точки зрения белых), поэтому отмена хода - O(1).
+    """
+
+    def __init__(self, piece_values: dict, pst: dict = None):
+        # Стоимость фигуры на поле с точки зрения белых: по умолчанию
+        # материал с бонусом за центр, иначе - настроенные таблицы
+        if pst is None:
+            pst = {piece_type: [value + center_bonus(square, value) for square in chess.SQUARES]
+                   for piece_type, value in piece_values.items()}
+        self.pst = pst
+        # Таблицы по цветам: для черных поле отражается по вертикали
+        mirror = [chess.square_mirror(square) for square in chess.SQUARES]
+        self.tables = ({piece_type: [table[square] for square in mirror] for piece_type, table in pst.items()},
+                       pst)
+        self.scores = [0]
+
+    def full_score(self, board: chess.Board) -> float:
+        """Полный пересчет по всем фигурам доски"""
+        score = 0
+        for square, piece in board.piece_map().items():
+            if piece.color == chess.WHITE:
+                score += self.pst[piece.piece_type][square]
+            else:
+                score -= self.tables[chess.BLACK][piece.piece_type][square]
+        return score
+
+    def reset(self, board: chess.Board):
+        self.scores = [self.full_score(board)]
+
+    @property
+    def score(self) -> float:
+        return self.scores[-1]
+
+    def push(self, board: chess.Board, move: chess.Move):
+        """Обновить оценку для хода (вызывается ДО board.push)"""
+        pst = self.tables[board.turn]
+        their = self.tables[not board.turn]
+        from_square, to_square = move.from_square, move.to_square
+        piece_type = board.piece_type_at(from_square)
+        if piece_type == chess.KING and board.is_castling(move):
+            king_to, rook_from, rook_to = castling_squares(board, move)
+            delta = (pst[chess.KING][king_to] - pst[chess.KING][from_square] +
+                     pst[chess.ROOK][rook_to] - pst[chess.ROOK][rook_from])
+        else:
+            delta = pst[move.promotion or piece_type][to_square] - pst[piece_type][from_square]
+            captured = board.piece_type_at(to_square)
+            if captured:
+                delta += their[captured][to_square]
+            else:
+                ep_pawn = ep_captured_square(board, move)
+                if ep_pawn is not None:
+                    delta += their[chess.PAWN][ep_pawn]
+        self.scores.append(self.scores[-1] + (delta if board.turn == chess.WHITE else -delta))
+
+    def pop(self):
+        self.scores.pop()
+
+
+class TranspositionTable:
+    """Таблица транспозиций фиксированного размера.
+
+    Каждая корзина состоит из двух ячеек: первая хранит самую глубокую запись
+    текущего поиска, вторая замещается всегда.
+    """
+
+    # Примерный размер одной записи (кортеж + числа) в памяти Python
+    ENTRY_BYTES = 160
+
+    def __init__(self, size_mb: float = 16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb: float):
+        self.size_mb = size_mb
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        self.clear()
+
+    def clear(self):
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+        self.age = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    def new_search(self):
+        """Новый поиск: записи прошлых ходов можно вытеснять из ячейки по глубине"""
+        self.age += 1
+
+    def probe(self, key: int):
+        """Запись (key, depth, score, flag, move, age) или None"""
+        index = key % self.buckets
+        deep = self.deep[index]
+        if deep is not None and deep[0] == key:
+            self.hits += 1
+            return deep
+        recent = self.recent[index]
+        if recent is not None and recent[0] == key:
+            self.hits += 1
+            return recent
+        self.misses += 1
+        if deep is not None or recent is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, flag: int, move):
+        index = key % self.buckets
+        entry = (key, depth, score, flag, move, self.age)
+        deep = self.deep[index]
+        if deep is None or depth >= deep[1] or deep[5] != self.age:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+    def stats(self) -> dict:
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
+
+
+class OpeningBook:
+    """Дебютная книга Polyglot (.bin).
+
+    Файл отображается в память, позиция ищется двоичным поиском по ключу
+    Зобриста, ход выбирается случайно с учетом весов книги.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.reader = chess.polyglot.open_reader(path)
+        self.hits = 0
+
+    def choose(self, board: chess.Board):
+        """Ход из книги или None, если позиции в книге нет"""
+        entries = list(self.reader.find_all(board))
+        if not entries:
+            return None
+        self.hits += 1
+        return random.choices([entry.move for entry in entries],
+                              weights=[entry.weight for entry in entries])[0]
+
+    def close(self):
+        self.reader.close()
+
+
+def default_book_path():
+    """Путь к книге по умолчанию, если она есть на диске"""
+    return DEFAULT_BOOK if os.path.exists(DEFAULT_BOOK) else None
+
+
+def default_params_path():
+    """Путь к настроенным весам оценки, если они есть на диске"""
+    return DEFAULT_PARAMS if os.path.exists(DEFAULT_PARAMS) else None
+
+
+class PositionCache:
+    """Результаты поиска на диске (SQLite в режиме WAL), общие для процессов и партий.
+
+    Ключ - отпечаток настроек поиска и оценки (MinMaxBot.search_fingerprint)
+    и Зобрист позиции: боты с разными весами или отсечениями делят файл,
+    но не записи. Хранятся глубина, оценка (в форме таблицы транспозиций),
+    тип оценки и лучший ход. Запись заменяется более глубокой или заметно
+    более свежей; при переполнении вытесняются старые и мелкие записи.
+    """
+
+    # Каждый полуход глубины при вытеснении стоит часа свежести
+    DEPTH_SECONDS = 3600
+    # Вытеснение проверяется не чаще, чем раз в столько записей
+    EVICT_EVERY = 1000
+
+    def __init__(self, path: str, max_entries: int = 1000000):
+        self.path = path
+        self.max_entries = max_entries
+        # Соединение используется и потоком обдумывания на времени соперника
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(positions)')]
+        if columns and 'fingerprint' not in columns:
+            # Файл без отпечатков: чьи это записи, уже не узнать
+            self.conn.execute('DROP TABLE positions')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS positions ('
+                          'fingerprint TEXT NOT NULL, key INTEGER NOT NULL, depth INTEGER NOT NULL, '
+                          'score REAL NOT NULL, flag INTEGER NOT NULL, move TEXT, updated INTEGER NOT NULL, '
+                          'PRIMARY KEY (fingerprint, key))')
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._since_evict = 0
+
+    @staticmethod
+    def _signed(key: int) -> int:
+        # Ключи SQLite - знаковые 64-битные
+        return key - (1 << 64) if key >= 1 << 63 else key
+
+    def probe(self, fingerprint: str, key: int):
+        """(глубина, оценка, тип оценки, ход) или None"""
+        with self.lock:
+            row = self.conn.execute('SELECT depth, score, flag, move FROM positions '
+                                    'WHERE fingerprint = ? AND key = ?',
+                                    (fingerprint, self._signed(key))).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        depth, score, flag, move = row
+        return depth, score, flag, chess.Move.from_uci(move) if move else None
+
+    def store_many(self, fingerprint: str, entries: list):
+        """Записать (ключ, глубина, оценка, тип оценки, ход) одной транзакцией"""
+        now = int(time.time())
+        rows = [(fingerprint, self._signed(key), depth, score, flag, move.uci() if move else None, now)
+                for key, depth, score, flag, move in entries]
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.executemany(
+                    'INSERT INTO positions (fingerprint, key, depth, score, flag, move, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(fingerprint, key) DO UPDATE SET depth = excluded.depth, score = excluded.score, '
+                    'flag = excluded.flag, move = excluded.move, updated = excluded.updated '
+                    'WHERE excluded.depth >= positions.depth '
+                    'OR positions.updated + positions.depth * ? < excluded.updated + excluded.depth * ?',
+                    [row + (self.DEPTH_SECONDS, self.DEPTH_SECONDS) for row in rows])
+                self.conn.execute('COMMIT')
+            except sqlite3.Error:
+                self.conn.execute('ROLLBACK')
+                raise
+            self._since_evict += len(rows)
+            if self._since_evict >= self.EVICT_EVERY:
+                self._since_evict = 0
+                self._evict()
+
+    def _evict(self):
+        count = self.conn.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Освобождаем с запасом, чтобы не вытеснять на каждой записи
+        excess = count - self.max_entries * 9 // 10
+        self.conn.execute('DELETE FROM positions WHERE rowid IN (SELECT rowid FROM positions '
+                          'ORDER BY updated + depth * ? LIMIT ?)', (self.DEPTH_SECONDS, excess))
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class Tablebase:
+    """Эндшпильные таблицы Syzygy из локальной папки.
+
+    Результаты проб (WDL и DTZ) кэшируются в LRU по ключу Зобриста.
+    """
+
+    def __init__(self, directory: str, cache_size: int = 65536):
+        self.directory = directory
+        self.tables = chess.syzygy.open_tablebase(directory)
+        # Имена таблиц вида KRPvKR: число фигур на единицу меньше длины имени
+        self.max_pieces = max((len(name) - 1 for name in self.tables.wdl), default=0)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.wdl_probes = 0
+        self.dtz_probes = 0
+        # Пробы с результатом (tbhits в UCI), в том числе из кэша
+        self.hits = 0
+        self.cache_hits = 0
+        self.failures = 0
+
+    def counters(self) -> dict:
+        return {'wdl_probes': self.wdl_probes, 'dtz_probes': self.dtz_probes, 'hits': self.hits,
+                'cache_hits': self.cache_hits, 'failures': self.failures}
+
+    def can_probe(self, board: chess.Board) -> bool:
+        return chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+
+    def _cached(self, cache_key, probe, board: chess.Board):
+        if cache_key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(cache_key)
+            result = self.cache[cache_key]
+        else:
+            try:
+                result = probe(board)
+            except KeyError:
+                # Нужной таблицы нет в папке
+                self.failures += 1
+                result = None
+            self.cache[cache_key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def probe_wdl(self, board: chess.Board, key: int):
+        """Выигрыш/ничья/проигрыш (2..-2) для стороны, которая ходит, или None"""
+        self.wdl_probes += 1
+        return self._cached((key, 'wdl'), self.tables.probe_wdl, board)
+
+    def probe_dtz(self, board: chess.Board, key: int):
+        self.dtz_probes += 1
+        return self._cached((key, 'dtz'), self.tables.probe_dtz, board)
+
+    def root_move(self, board: chess.Board, zobrist):
+        """Лучший ход по таблицам: выигрыш с быстрейшим обнулением счетчика
+        50 ходов, при проигрыше - самое долгое сопротивление. None, если
+        какой-то из таблиц нет."""
+        best_move = None
+        best_rank = None
+        for move in board.legal_moves:
+            zeroing = board.is_zeroing(move)
+            board.push(move)
+            if board.is_checkmate():
+                board.pop()
+                return move
+            key = zobrist(board)
+            wdl = self.probe_wdl(board, key)
+            dtz = self.probe_dtz(board, key)
+            board.pop()
+            if wdl is None or dtz is None:
+                return None
+            # Оценки позиции после хода - с точки зрения соперника
+            wdl, dtz = -wdl, -dtz
+            if wdl > 0:
+                rank = (wdl, zeroing, -dtz)
+            else:
+                rank = (wdl, False, abs(dtz))
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+    def close(self):
+        self.tables.close()
+
+
+class SearchStats:
+    """Статистика поиска по итерациям (MinMaxBot(stats=True)).
+
+    Счетчики бота снимаются только на границах итераций, поэтому сама
+    статистика поиск не замедляет; выключенная - не стоит ничего.
+    """
+
+    def __init__(self):
+        self.depths = []
+        self._start = 0.0
+        self._base = {}
+        self._tablebase_base = {}
+
+    def begin(self, bot):
+        self.depths = []
+        self._start = time.time()
+        # Счетчики таблицы копятся между поисками: считаем от текущих значений
+        self._base = {'tt_hits': bot.tt.hits, 'tt_probes': bot.tt.hits + bot.tt.misses,
+                      'pawn_hits': bot.pawn_table.hits,
+                      'pawn_probes': bot.pawn_table.hits + bot.pawn_table.misses}
+        self._tablebase_base = bot.tablebase.counters() if bot.tablebase is not None else {}
+
+    def record(self, bot, depth: int):
+        """Итоги завершенной итерации (счетчики - нарастающим итогом с начала хода)"""
+        self.depths.append({
+            'depth': depth,
+            'nodes': bot.nodes,
+            'qnodes': bot.qnodes,
+            'tt_hits': bot.tt.hits - self._base['tt_hits'],
+            'tt_probes': bot.tt.hits + bot.tt.misses - self._base['tt_probes'],
+            'pawn_hits': bot.pawn_table.hits - self._base['pawn_hits'],
+            'pawn_probes': bot.pawn_table.hits + bot.pawn_table.misses - self._base['pawn_probes'],
+            'beta_cutoffs': bot.beta_cutoffs,
+            'first_move_cutoffs': bot.first_move_cutoffs,
+            'time': time.time() - self._start,
+        })
+
+    def branching_factor(self) -> float:
+        """Эффективный коэффициент ветвления: во сколько раз в среднем растет
+        число узлов итерации с каждой следующей глубиной"""
+        nodes = [row['nodes'] for row in self.depths]
+        iteration_nodes = [current - previous for previous, current in zip([0] + nodes, nodes)]
+        if len(iteration_nodes) < 2 or not iteration_nodes[0]:
+            return 0.0
+        return (iteration_nodes[-1] / iteration_nodes[0]) ** (1 / (len(iteration_nodes) - 1))
+
+    def summary(self, bot, move) -> dict:
+        """Итог хода одной записью: для журнала и сравнения версий"""
+        elapsed = time.time() - self._start
+        last = self.depths[-1] if self.depths else None
+        tt_probes = last['tt_probes'] if last else 0
+        pawn_probes = last['pawn_probes'] if last else 0
+        summary = {
+            'move': move.uci() if move else None,
+            'depth': bot.last_depth,
+            'score': bot.last_score,
+            'pv': [pv_move.uci() for pv_move in bot.last_pv],
+            'nodes': bot.nodes,
+            'qnodes': bot.qnodes,
+            'nps': int(bot.nodes / elapsed) if elapsed > 0 else 0,
+            'time': round(elapsed, 4),
+            'tt_hits': last['tt_hits'] if last else 0,
+            'tt_hit_rate': round(last['tt_hits'] / tt_probes, 4) if tt_probes else 0.0,
+            'pawn_hit_rate': round(last['pawn_hits'] / pawn_probes, 4) if pawn_probes else 0.0,
+            'beta_cutoffs': bot.beta_cutoffs,
+            'first_move_cutoff_rate': round(bot.first_move_cutoff_rate(), 2),
+            'ebf': round(self.branching_factor(), 3),
+            'depth_times': [[row['depth'], round(row['time'], 4)] for row in self.depths],
+        }
+        if bot.tablebase is not None:
+            # Пробы таблиц Syzygy за ход: в корне и в поиске
+            for name, value in bot.tablebase.counters().items():
+                summary['tb_' + name] = value - self._tablebase_base.get(name, 0)
+        return summary
+
+
+class SearchTimeout(Exception):
+    """Исчерпан лимит времени или узлов на ход"""
+
+
+def score_to_tt(score: float, ply: int) -> float:
+    """Матовые оценки хранятся относительно узла, а не корня"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score: float, ply: int) -> float:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
 
 
 class MinMaxBot:
     """Бот с алгоритмом минимакс (максимальная сложность)"""
 
-    def __init__(self):
+    def __init__(self, hash_mb: float = 16, time_limit: float = 2.0, max_nodes: int = None,
+                 max_depth: int = 64, mobility: bool = True, evaluator=None, threads: int = 1,
+                 null_move: bool = True, lmr: bool = True, futility: bool = True,
+                 book_path: str = None, syzygy_path: str = None, stats: bool = False,
+                 params_path: str = None, hard_deadline: bool = False, cache_path: str = None):
         self.name = "Бот (макс. сложность)"
         self.piece_values = {
             chess.PAWN: 100,
@@ -16,120 +718,991 @@ class MinMaxBot:
             chess.QUEEN: 900,
             chess.KING: 20000
         }
+        self.zobrist = Zobrist()
+        self.eval_state = EvalState(self.piece_values)
+        self.eval_weights = dict(EVAL_WEIGHTS)
+        self.pawn_table = PawnHashTable()
+        # Настроенные веса: явный файл или eval_params.json рядом с ботом
+        # ('' - оставить веса по умолчанию)
+        params_path = default_params_path() if params_path is None else params_path
+        self.params_path = ''
+        if params_path:
+            self.load_params(params_path)
+        # Мобильность в поиске считается по псевдолегальным ходам
+        self.use_mobility = mobility
+        # Альтернативная оценка материала (например, NumpyEvaluator) вместо EvalState
+        self.evaluator = evaluator
+        # Таблица живет между вызовами get_move в течение всей партии
+        self.tt = TranspositionTable(hash_mb)
+        self._pieces_keys = []
+        self._keys = []
+
+        # Лимиты на один ход (None - без ограничения)
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.qnodes = 0
+        self._deadline = None
+        self._node_limit = None
+        # Внешний сигнал остановки (multiprocessing.Event у процессов Lazy SMP)
+        self._stop_event = None
+        # Остановка текущего поиска из другого потока (stop())
+        self._cancel = threading.Event()
+        # Жесткий лимит: время не превышается даже ценой недосчитанной первой итерации
+        self.hard_deadline = hard_deadline
+        self._check_mask = (HARD_CHECK_INTERVAL if hard_deadline else CHECK_INTERVAL) - 1
+        # Лучший ход прерванной итерации (уже лучше хода прошлой итерации)
+        self._partial_move = None
+
+        # Параллельный поиск: число процессов и разнообразие помощников
+        self.threads = threads
+        self._smp = None
+        self.depth_offset = 0
+        self.order_noise = 0
+
+        # Главный вариант прошлой итерации для сортировки ходов
+        self._pv = []
+        self._follow_pv = False
 
-    def evaluate_position(self, board: chess.Board) -> float:
-        """Оценка позиции с продвинутыми эвристиками"""
-        if board.is_checkmate():
-            return -100000 if board.turn else 100000
+        # Ходы-убийцы (два на полуход) и история тихих ходов [цвет][откуда][куда]
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (2 * 64 * 64)
 
-        if board.is_stalemate() or board.is_insufficient_material():
+        # Качество сортировки: доля отсечений на первом ходе
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+
+        # PVS и окна стремления (0 - искать корень с полным окном)
+        self.aspiration_window = ASPIRATION_WINDOW
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+
+        # Нулевой ход и сокращения поздних ходов (отключаются для A/B-сравнения)
+        self.null_move = null_move
+        self.lmr = lmr
+        self.null_move_cutoffs = 0
+        self.lmr_researches = 0
+
+        # Отсечение бесперспективных ходов у листьев и пропуск проигрышных взятий
+        self.futility = futility
+        self.futility_prunes = 0
+        self.see_prunes = 0
+
+        # Дебютная книга: в начале партии ход берется из нее без поиска
+        self.book = OpeningBook(book_path) if book_path else None
+        # Эндшпильные таблицы Syzygy: в корне и в поиске
+        self.tablebase = Tablebase(syzygy_path) if syzygy_path else None
+        # Кэш результатов на диске: новый процесс начинает с прогретой таблицы
+        self.cache = PositionCache(cache_path) if cache_path else None
+
+        # Обдумывание на времени соперника: фоновый поиск позиции после
+        # ожидаемого ответа (второй ход главного варианта)
+        self._ponder_thread = None
+        self._ponder_key = None
+        self._ponder_start = 0.0
+        self._ponder_move = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+        # Статистика по итерациям и строка журнала на каждый ход (по запросу)
+        self.stats = SearchStats() if stats else None
+        # Обратный вызов после каждой завершенной итерации: (глубина, оценка, вариант)
+        self.on_iteration = None
+
+        # Итоги последнего поиска
+        self.last_depth = 0
+        self.last_score = 0
+        self.last_pv = []
+
+        if threads > 1:
+            # Настройки, которые процессы не могут повторить, - ошибка сразу, а не при первом поиске
+            self._smp_options()
+
+    def load_params(self, path: str):
+        """Загрузить веса оценки, записанные chess_tuner.py"""
+        with open(path, encoding='utf-8') as file:
+            params = json.load(file)
+        pst = {chess.PIECE_NAMES.index(name): table for name, table in params['pst'].items()}
+        self.eval_state = EvalState(self.piece_values, pst)
+        self.eval_weights.update(params.get('weights', {}))
+        # Процессы Lazy SMP загружают тот же файл
+        self.params_path = path
+
+    def new_game(self):
+        """Сбросить накопленные за партию данные поиска"""
+        self.stop_ponder()
+        self.tt.clear()
+        if self._smp is not None:
+            self._smp.table.clear()
+
+    def set_hash(self, size_mb: float):
+        """Новый размер таблицы транспозиций (содержимое теряется)"""
+        self.tt.resize(size_mb)
+        self._close_smp()
+
+    def set_syzygy_path(self, path: str):
+        """Подключить таблицы Syzygy из папки ('' - отключить)"""
+        if self.tablebase is not None:
+            self.tablebase.close()
+        self.tablebase = Tablebase(path) if path else None
+        self._close_smp()
+
+    def set_threads(self, threads: int):
+        """Новое число процессов поиска"""
+        if threads > 1:
+            self._smp_options()
+        self.threads = max(1, threads)
+        self._close_smp()
+
+    def _close_smp(self):
+        # Процессы Lazy SMP пересоздаются при следующем поиске с новыми настройками
+        if self._smp is not None:
+            self._smp.close()
+            self._smp = None
+
+    def close(self):
+        """Остановить процессы параллельного поиска и закрыть книгу"""
+        self.stop_ponder()
+        self._close_smp()
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def _set_root(self, board: chess.Board):
+        pieces_key = self.zobrist.pieces_key(board)
+        self._pieces_keys = [pieces_key]
+        # Ключи позиций партии с последнего необратимого хода - для повторений
+        history = []
+        previous = board.copy()
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            previous.pop()
+            history.append(self.zobrist(previous))
+        history.reverse()
+        self._keys = history + [pieces_key ^ self.zobrist.state_key(board)]
+        self.eval_state.reset(board)
+
+    def _push(self, board: chess.Board, move: chess.Move):
+        """Сделать ход в поиске, обновив ключ Зобриста и оценку"""
+        pieces_key = self.zobrist.update_pieces_key(board, move, self._pieces_keys[-1])
+        self.eval_state.push(board, move)
+        board.push(move)
+        self._pieces_keys.append(pieces_key)
+        self._keys.append(pieces_key ^ self.zobrist.state_key(board))
+
+    def _push_null(self, board: chess.Board):
+        """Пропуск хода для отсечения нулевым ходом"""
+        board.push(chess.Move.null())
+        # Повторения через нулевой ход не считаются
+        board.halfmove_clock = 0
+        self._pieces_keys.append(self._pieces_keys[-1])
+        self._keys.append(self._pieces_keys[-1] ^ self.zobrist.state_key(board))
+        self.eval_state.scores.append(self.eval_state.score)
+
+    def _pop(self, board: chess.Board):
+        board.pop()
+        self.eval_state.pop()
+        self._pieces_keys.pop()
+        self._keys.pop()
+
+    def _is_draw(self, board: chess.Board) -> bool:
+        """Дешевая проверка ничьей в поиске (вместо board.is_game_over()).
+
+        Повторение ищется по стеку ключей Зобриста: позиция могла встретиться
+        только через четное число полуходов и не раньше последнего взятия
+        или хода пешкой.
+        """
+        halfmove_clock = board.halfmove_clock
+        if halfmove_clock >= 100:
+            return True
+        keys = self._keys
+        key = keys[-1]
+        for back in range(4, min(halfmove_clock, len(keys) - 1) + 1, 2):
+            if keys[-1 - back] == key:
+                return True
+        return chess.popcount(board.occupied) <= 4 and board.is_insufficient_material()
+
+    def _check_limits(self):
+        """Проверка лимитов; первая итерация доигрывается до конца, если лимит не жесткий"""
+        if self.last_depth == 0 and not self.hard_deadline:
+            return
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchTimeout()
+        if self.nodes & self._check_mask == 0:
+            if self._deadline is not None and time.time() >= self._deadline:
+                raise SearchTimeout()
+            if self._cancel.is_set():
+                raise SearchTimeout()
+            if self._stop_event is not None and self._stop_event.is_set():
+                raise SearchTimeout()
+
+    def _move_score(self, board: chess.Board, move: chess.Move, ply: int) -> int:
+        """Приоритет хода без учета хода из таблицы и главного варианта"""
+        victim = board.piece_type_at(move.to_square)
+        if victim is None and board.is_en_passant(move):
+            victim = chess.PAWN
+        if victim is not None:
+            # MVV-LVA: самая ценная жертва, самый дешевый нападающий
+            attacker = board.piece_type_at(move.from_square)
+            score = 10 * victim - attacker + (move.promotion or 0)
+            # Взятие более дешевой фигуры проверяем разменом
+            if self.piece_values[victim] < self.piece_values[attacker] and \
+                    see(board, move, self.piece_values) < 0:
+                return BAD_CAPTURE_SCORE + score
+            return CAPTURE_SCORE + score
+        if move.promotion:
+            return PROMOTION_SCORE + move.promotion
+        killers = self.killers[ply]
+        if move == killers[0]:
+            return KILLER_SCORES[0]
+        if move == killers[1]:
+            return KILLER_SCORES[1]
+        score = self.history[(board.turn * 64 + move.from_square) * 64 + move.to_square]
+        if self.order_noise:
+            # Помощники Lazy SMP перебирают тихие ходы в немного другом порядке
+            score += random.randrange(self.order_noise)
+        return score
+
+    def _order_moves(self, board: chess.Board, moves: list, tt_move, ply: int) -> list:
+        """Сортировка ходов: главный вариант, ход из таблицы, взятия по MVV-LVA,
+        превращения, ходы-убийцы, остальные тихие ходы по истории"""
+        pv_move = None
+        if self._follow_pv:
+            if ply < len(self._pv) and self._pv[ply] in moves:
+                pv_move = self._pv[ply]
+            else:
+                self._follow_pv = False
+
+        scored = []
+        for move in moves:
+            if move == pv_move:
+                score = PV_MOVE_SCORE
+            elif move == tt_move:
+                score = TT_MOVE_SCORE
+            else:
+                score = self._move_score(board, move, ply)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _update_quiet_cutoff(self, board: chess.Board, move: chess.Move, depth: int, ply: int):
+        """Запомнить тихий ход, вызвавший отсечение"""
+        if board.is_capture(move) or move.promotion:
+            return
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        index = (board.turn * 64 + move.from_square) * 64 + move.to_square
+        self.history[index] = min(self.history[index] + depth * depth, KILLER_SCORES[1] - 1)
+
+    def first_move_cutoff_rate(self) -> float:
+        """Доля отсечений, случившихся на первом ходе (в процентах)"""
+        if not self.beta_cutoffs:
+            return 0.0
+        return 100.0 * self.first_move_cutoffs / self.beta_cutoffs
+
+    def _extract_pv(self, board: chess.Board, depth: int) -> list:
+        """Главный вариант по лучшим ходам из таблицы транспозиций"""
+        pv = []
+        seen = set()
+        board = board.copy(stack=False)
+        for _ in range(depth):
+            key = self.zobrist(board)
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None or not board.is_legal(entry[4]):
+                break
+            pv.append(entry[4])
+            board.push(entry[4])
+        return pv
+
+    def evaluate_position(self, board: chess.Board, material: float = None, legal_moves: list = None) -> float:
+        """Оценка позиции с продвинутыми эвристиками.
+
+        material - готовый материал с бонусами за центр (в поиске берется
+        из EvalState), иначе считается по всей доске. legal_moves - уже
+        сгенерированный список ходов, чтобы не строить его повторно.
+        """
+        if legal_moves is None:
+            legal_moves = list(board.legal_moves)
+        in_check = board.is_check()
+        if not legal_moves:
+            if in_check:
+                return -100000 if board.turn else 100000
             return 0
 
-        score = 0
+        if board.is_insufficient_material():
+            return 0
 
-        # Материальный счет
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = self.piece_values[piece.piece_type]
-                if piece.color == chess.WHITE:
-                    score += value
-                else:
-                    score -= value
-
-                # Бонус за центральные поля для пешек и фигур
-                file, rank = chess.square_file(square), chess.square_rank(square)
-                center_bonus = 0
-                if 2 <= file <= 5 and 2 <= rank <= 5:
-                    center_bonus = 10 * value / 100
-                elif 3 <= file <= 4 and 3 <= rank <= 4:
-                    center_bonus = 20 * value / 100
-
-                if piece.color == chess.WHITE:
-                    score += center_bonus
-                else:
-                    score -= center_bonus
+        # Материальный счет и бонус за центральные поля
+        score = self._material(board) if material is None else material
+        return score + self._positional_score(board, len(legal_moves), in_check)
+
+    def static_eval(self, board: chess.Board, in_check: bool) -> float:
+        """Оценка листа в поиске без генерации легальных ходов"""
+        mobility = self._pseudo_mobility(board) if self.use_mobility else 0
+        material = self.eval_state.score if self.evaluator is None else self.evaluator.evaluate(board)
+        return material + self._positional_score(board, mobility, in_check)
+
+    def _material(self, board: chess.Board) -> float:
+        """Материал с бонусами за центр полным пересчетом"""
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(board)
+        return self.eval_state.full_score(board)
+
+    def _pseudo_mobility(self, board: chess.Board) -> int:
+        """Дешевая мобильность: поля под ударом фигур и ходы пешек вперед"""
+        own = board.occupied_co[board.turn]
+        count = 0
+        for square in chess.scan_forward(own & ~board.pawns):
+            count += chess.popcount(board.attacks_mask(square) & ~own)
+        pawns = own & board.pawns
+        pushes = pawns << 8 if board.turn == chess.WHITE else pawns >> 8
+        return count + chess.popcount(pushes & ~board.occupied & chess.BB_ALL)
+
+    def _positional_score(self, board: chess.Board, mobility: int, in_check: bool) -> float:
+        """Мобильность, безопасность короля, шах и пешечная структура (с точки зрения белых)"""
+        sign = 1 if board.turn else -1
+        weights = self.eval_weights
 
         # Мобильность (количество возможных ходов)
-        score += len(list(board.legal_moves)) * 5 * (1 if board.turn else -1)
+        score = mobility * weights['mobility'] * sign
 
         # Безопасность короля
         king_square = board.king(board.turn)
         if king_square:
             file, rank = chess.square_file(king_square), chess.square_rank(king_square)
             if rank == (0 if board.turn else 7):  # Король в углу
-                score += -30 * (1 if board.turn else -1)
+                score += weights['king_back_rank'] * sign
             elif file in [0, 7] or rank in [0, 7]:  # Король на краю
-                score += -20 * (1 if board.turn else -1)
+                score += weights['king_edge'] * sign
 
         # Шах
-        if board.is_check():
-            score += -50 * (1 if board.turn else -1)
+        if in_check:
+            score += weights['check'] * sign
+
+        # Пешечная структура из кэша (признаки уже с точки зрения белых)
+        doubled, isolated, passed = self.pawn_table.probe(board)
+        score += (doubled * weights['doubled_pawn'] + isolated * weights['isolated_pawn'] +
+                  passed * weights['passed_pawn'])
 
         return score
 
-    def minimax(self, board: chess.Board, depth: int, alpha: float, beta: float, maximizing: bool) -> float:
-        """Алгоритм минимакс с альфа-бета отсечением (рекурсивный)"""
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_position(board)
+    def minimax(self, board: chess.Board, depth: int, alpha: float, beta: float, ply: int = 0) -> float:
+        """Алгоритм минимакс с альфа-бета отсечением (рекурсивный, в форме негамакса).
 
-        legal_moves = list(board.legal_moves)
+        Оценка возвращается с точки зрения стороны, которая ходит.
+        """
+        self.nodes += 1
+        self._check_limits()
 
-        if maximizing:
-            max_eval = -float('inf')
-            for move in legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, False)
-                board.pop()
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
+        # Ничьи по правилам проверяем без генерации ходов
+        if ply and self._is_draw(board):
+            return 0
+
+        key = self._keys[-1]
+        tablebase = self.tablebase
+        if tablebase is not None and ply and board.halfmove_clock == 0 and tablebase.can_probe(board):
+            # Сразу после взятия или хода пешкой результат по таблицам точен
+            wdl = tablebase.probe_wdl(board, key)
+            if wdl is not None:
+                if wdl == 2:
+                    return TB_WIN_SCORE - ply
+                if wdl == -2:
+                    return -TB_WIN_SCORE + ply
+                return 0
+
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if entry[1] >= depth:
+                tt_score = score_from_tt(entry[2], ply)
+                if entry[3] == EXACT:
+                    return tt_score
+                if entry[3] == LOWER and tt_score >= beta:
+                    return tt_score
+                if entry[3] == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, ply)
+
+        in_check = board.is_check()
+        if self._null_move_allowed(board, depth, beta, ply, in_check):
+            # Даже пропустив ход, позиция держит beta - значит, можно отсечь
+            reduction = 3 if depth >= 6 else 2
+            self._push_null(board)
+            eval = -self.minimax(board, depth - 1 - reduction, -beta, -beta + 1, ply + 1)
+            self._pop(board)
+            if eval >= beta:
+                self.null_move_cutoffs += 1
+                return beta if eval >= MATE_BOUND else eval
 
-    def get_move(self, board: chess.Board) -> chess.Move:
-        """Получить лучший ход"""
+        # Единственная генерация ходов в узле: и для мата/пата, и для перебора
         legal_moves = list(board.legal_moves)
         if not legal_moves:
-            raise Exception("Нет возможных ходов")
+            return -MATE_SCORE + ply if in_check else 0
+        legal_moves = self._order_moves(board, legal_moves, tt_move, ply)
+        killers = self.killers[ply]
+
+        # У листьев тихие ходы и проигрышные взятия не поднимут оценку до alpha
+        futility_base = None
+        if self.futility and depth < len(FUTILITY_MARGINS) and not in_check and abs(alpha) < MATE_BOUND:
+            static = self.static_eval(board, False)
+            futility_base = (static if board.turn == chess.WHITE else -static) + FUTILITY_MARGINS[depth]
+            if futility_base > alpha:
+                futility_base = None
 
+        best_eval = -float('inf')
         best_move = None
-        best_value = -float('inf')
+        for index, move in enumerate(legal_moves):
+            if futility_base is not None and index and not move.promotion:
+                gain = see(board, move, self.piece_values) if board.is_capture(move) else 0
+                if futility_base + gain <= alpha and not board.gives_check(move):
+                    self.futility_prunes += 1
+                    continue
 
-        # Увеличиваем глубину поиска для большей сложности
-        depth = 3  # Можно увеличить для еще большей сложности
+            # Поздние тихие ходы сначала смотрим на меньшую глубину
+            reduction = 0
+            if (self.lmr and index >= LMR_FULL_MOVES and depth >= 3 and not in_check and
+                    not move.promotion and move not in killers and not board.is_capture(move)):
+                reduction = 1 if index < 2 * LMR_FULL_MOVES else 2
+            self._push(board, move)
+            if index == 0:
+                eval = -self.minimax(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                if reduction and not board.is_check():
+                    eval = -self.minimax(board, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                    if eval > alpha:
+                        self.lmr_researches += 1
+                        eval = -self.minimax(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                else:
+                    # PVS: остальные ходы проверяем нулевым окном (оценки целые),
+                    # полный перебор - только если ход оказался лучше
+                    eval = -self.minimax(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < eval < beta:
+                    self.pvs_researches += 1
+                    eval = -self.minimax(board, depth - 1, -beta, -alpha, ply + 1)
+            self._pop(board)
+            # Главный вариант прошлой итерации уже пройден
+            self._follow_pv = False
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            alpha = max(alpha, eval)
+            if beta <= alpha:
+                self.beta_cutoffs += 1
+                if index == 0:
+                    self.first_move_cutoffs += 1
+                self._update_quiet_cutoff(board, move, depth, ply)
+                break
 
-        for move in legal_moves:
-            board.push(move)
-            move_value = self.minimax(board, depth - 1, -float('inf'), float('inf'), False)
-            board.pop()
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, score_to_tt(best_eval, ply), flag, best_move)
+        return best_eval
+
+    def _null_move_allowed(self, board: chess.Board, depth: int, beta: float, ply: int,
+                           in_check: bool) -> bool:
+        """Условия нулевого хода: не под шахом, не два пропуска подряд и не
+        в пешечном эндшпиле, где возможен цугцванг"""
+        if not self.null_move or in_check or depth < 3 or ply == 0 or abs(beta) >= MATE_BOUND:
+            return False
+        if board.move_stack and not board.move_stack[-1]:
+            return False
+        if not board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+            return False
+        static = self.static_eval(board, False)
+        return (static if board.turn == chess.WHITE else -static) >= beta
+
+    def quiescence(self, board: chess.Board, alpha: float, beta: float, ply: int) -> float:
+        """Поиск только взятий и превращений на листьях (против эффекта горизонта)"""
+        self.nodes += 1
+        self.qnodes += 1
+        self._check_limits()
+
+        in_check = board.is_check()
+        if in_check:
+            # Под шахом стоять нельзя: перебираем все ответы
+            moves = list(board.legal_moves)
+            if not moves:
+                return -MATE_SCORE + ply
+            stand_pat = best_eval = -float('inf')
+        else:
+            stand_pat = self.static_eval(board, False)
+            if board.turn == chess.BLACK:
+                stand_pat = -stand_pat
+            if stand_pat >= beta or ply >= MAX_PLY - 1:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_eval = stand_pat
+            moves = list(board.generate_legal_captures())
+            promotion_from = board.pawns & board.occupied_co[board.turn] & (
+                chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2)
+            if promotion_from:
+                moves.extend(move for move in board.generate_legal_moves(promotion_from, ~board.occupied)
+                             if move.promotion == chess.QUEEN)
+
+        scored = sorted(((self._move_score(board, move, ply), move) for move in moves),
+                        key=lambda item: item[0], reverse=True)
+        for score, move in scored:
+            if not in_check:
+                # Проигрышные по SEE взятия не рассматриваем
+                if score < 0:
+                    self.see_prunes += 1
+                    continue
+                # Отсечение по дельте: даже выигрыш фигуры не поднимет оценку до alpha
+                victim = board.piece_type_at(move.to_square)
+                gain = self.piece_values[victim] if victim else 0
+                if move.promotion:
+                    gain += self.piece_values[move.promotion] - self.piece_values[chess.PAWN]
+                elif victim is None:
+                    gain = self.piece_values[chess.PAWN]  # взятие на проходе
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+
+            self._push(board, move)
+            eval = -self.quiescence(board, -beta, -alpha, ply + 1)
+            self._pop(board)
+            if eval > best_eval:
+                best_eval = eval
+            if eval >= beta:
+                return eval
+            alpha = max(alpha, eval)
+        return best_eval
+
+    def search_root(self, board: chess.Board, legal_moves: list, depth: int,
+                    alpha: float = -float('inf'), beta: float = float('inf'), store: bool = True):
+        """Одна итерация поиска на заданную глубину в окне (alpha, beta): (оценка, лучший ход).
+
+        store=False - не записывать корень в таблицу: legal_moves не все ходы
+        позиции, и оценка корня была бы неверной.
+        """
+        best_move = None
+        best_value = -float('inf')
+        self._follow_pv = bool(self._pv)
+        self._partial_move = None
+        for move in self._order_moves(board, legal_moves, None, 0):
+            self._push(board, move)
+            if best_move is None:
+                move_value = -self.minimax(board, depth - 1, -beta, -alpha, 1)
+            else:
+                floor = max(alpha, best_value)
+                move_value = -self.minimax(board, depth - 1, -floor - 1, -floor, 1)
+                if floor < move_value < beta:
+                    self.pvs_researches += 1
+                    move_value = -self.minimax(board, depth - 1, -beta, -floor, 1)
+            self._pop(board)
+            self._follow_pv = False
 
             if move_value > best_value:
                 best_value = move_value
                 best_move = move
-            elif move_value == best_value and random.random() > 0.5:
-                # Если оценки равны, выбираем случайно для разнообразия
-                best_move = move
+                # Ход, досчитанный выше alpha, можно сыграть даже при прерывании итерации
+                if move_value > alpha:
+                    self._partial_move = move
+            if best_value >= beta:
+                break
+
+        if best_value <= alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if store:
+            self.tt.store(self._keys[-1], depth, score_to_tt(best_value, 0), flag, best_move)
+        return best_value, best_move
+
+    def _aspiration_search(self, board: chess.Board, legal_moves: list, depth: int):
+        """Поиск в узком окне вокруг прошлой оценки с расширением при выходе за него"""
+        delta = self.aspiration_window
+        if not delta or self.last_depth == 0 or abs(self.last_score) >= MATE_BOUND:
+            return self.search_root(board, legal_moves, depth)
+
+        alpha, beta = self.last_score - delta, self.last_score + delta
+        while True:
+            value, move = self.search_root(board, legal_moves, depth, alpha, beta)
+            if alpha < value < beta:
+                return value, move
+            self.aspiration_researches += 1
+            delta *= 2
+            if value <= alpha:
+                alpha = value - delta
+            else:
+                beta = value + delta
+            if delta > 1000:
+                alpha, beta = -float('inf'), float('inf')
+
+    def get_move(self, board: chess.Board, time_limit: float = None, max_nodes: int = None,
+                 max_depth: int = None) -> chess.Move:
+        """Получить лучший ход (итеративное углубление до исчерпания лимита)"""
+        try:
+            if self.stats is None:
+                return self._get_move(board, time_limit, max_nodes, max_depth)
+            self.stats.begin(self)
+            move = self._get_move(board, time_limit, max_nodes, max_depth)
+            logger.info('search %s', json.dumps(self.stats.summary(self, move), ensure_ascii=False))
+            return move
+        finally:
+            self._cancel.clear()
+
+    def _get_move(self, board: chess.Board, time_limit: float, max_nodes: int,
+                  max_depth: int) -> chess.Move:
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            raise Exception("Нет возможных ходов")
+
+        time_limit = self.time_limit if time_limit is None else time_limit
+        if self._ponder_thread is not None:
+            ponder_move = self._finish_ponder(board, time_limit)
+            if ponder_move is not None:
+                return ponder_move
+
+        if self.book is not None:
+            # Разнообразие партий дает взвешенный случайный выбор хода книги
+            book_move = self.book.choose(board)
+            if book_move is not None:
+                self.nodes = self.qnodes = 0
+                self.last_depth, self.last_score, self.last_pv = 0, 0, [book_move]
+                return book_move
+
+        if self.tablebase is not None and self.tablebase.can_probe(board):
+            tablebase_move = self.tablebase.root_move(board, self.zobrist)
+            if tablebase_move is not None:
+                self.nodes = self.qnodes = 0
+                self.last_depth, self.last_score, self.last_pv = 0, 0, [tablebase_move]
+                return tablebase_move
 
+        max_nodes = self.max_nodes if max_nodes is None else max_nodes
+        max_depth = self.max_depth if max_depth is None else max_depth
+        if self.threads > 1:
+            return self._parallel_move(board, time_limit, max_nodes, max_depth)
+        return self._search(board, legal_moves, time_limit, max_nodes, max_depth)
+
+    def _search(self, board: chess.Board, legal_moves: list, time_limit: float, max_nodes: int,
+                max_depth: int) -> chess.Move:
+        """Итеративное углубление от корня board"""
+        # Ищем на копии: при прерывании поиска доска вызывающего не портится
+        root = board
+        board = board.copy()
+        start = self._begin_search(board, time_limit, max_nodes)
+        if self.cache is not None:
+            cached_move = self._load_cache(root, max_depth)
+            if cached_move is not None:
+                return cached_move
+
+        # Если жесткий лимит прервет даже первую итерацию - лучший ход по сортировке
+        best_move = self._order_moves(board, legal_moves, None, 0)[0]
+        for depth in range(min(1 + self.depth_offset, max_depth), max_depth + 1):
+            try:
+                value, move = self._aspiration_search(board, legal_moves, depth)
+            except SearchTimeout:
+                if self._partial_move is not None and self._partial_move != best_move:
+                    best_move = self._partial_move
+                    # Продолжение - из таблицы: после хода поиск досчитан на depth - 1.
+                    # Рабочая доска осталась в прерванном узле, поэтому от root
+                    after = root.copy(stack=False)
+                    after.push(best_move)
+                    self.last_pv = [best_move] + self._extract_pv(after, depth - 1)
+                break
+            best_move = move
+            self._pv = self._extract_pv(board, depth)
+            if not self._pv or self._pv[0] != move:
+                self._pv = [move]
+            self.last_depth, self.last_score, self.last_pv = depth, value, self._pv
+            if self.stats is not None:
+                self.stats.record(self, depth)
+            if self.on_iteration is not None:
+                self.on_iteration(depth, value, self._pv)
+
+            # Найден мат или следующая итерация заведомо не успеет закончиться
+            if abs(value) >= MATE_BOUND:
+                break
+            if self._deadline is not None and time.time() - start > time_limit / 2:
+                break
+
+        if self.cache is not None and self.last_depth:
+            self._save_cache(root)
         return best_move
 
+    def _load_cache(self, board: chess.Board, max_depth: int):
+        """Перенести в таблицу транспозиций записи кэша вдоль сохраненного
+        главного варианта. Если корень уже посчитан точно на нужную глубину,
+        вернуть его ход без поиска."""
+        board = board.copy(stack=False)
+        fingerprint = self.search_fingerprint()
+        entries = []
+        for _ in range(max_depth):
+            key = self.zobrist(board)
+            entry = self.cache.probe(fingerprint, key)
+            if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+                break
+            depth, score, flag, move = entry
+            self.tt.store(key, depth, score, flag, move)
+            entries.append(entry)
+            board.push(move)
+        if not entries:
+            return None
+
+        pv = [entry[3] for entry in entries]
+        self._pv = pv
+        depth, score, flag, move = entries[0]
+        if flag == EXACT and depth >= max_depth:
+            self.last_depth, self.last_score, self.last_pv = depth, score, pv
+            return move
+        return None
+
+    def _save_cache(self, board: chess.Board):
+        """Записать в кэш записи таблицы вдоль найденного главного варианта"""
+        board = board.copy(stack=False)
+        entries = []
+        for move in self.last_pv:
+            key = self.zobrist(board)
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] != move:
+                break
+            entries.append((key, entry[1], entry[2], entry[3], move))
+            board.push(move)
+        if entries:
+            self.cache.store_many(self.search_fingerprint(), entries)
+
+    def search_fingerprint(self) -> str:
+        """Отпечаток всего, от чего зависят оценки и ходы поиска: веса оценки,
+        альтернативная оценка, мобильность, отсечения и таблицы Syzygy"""
+        evaluator = None
+        if self.evaluator is not None:
+            try:
+                evaluator = hashlib.sha1(pickle.dumps(self.evaluator)).hexdigest()
+            except Exception:
+                # Непереносимую оценку различаем хотя бы по типу
+                evaluator = type(self.evaluator).__qualname__
+        settings = {
+            'piece_values': self.piece_values,
+            'pst': self.eval_state.pst,
+            'weights': self.eval_weights,
+            'evaluator': evaluator,
+            'mobility': self.use_mobility,
+            'null_move': self.null_move,
+            'lmr': self.lmr,
+            'futility': self.futility,
+            'syzygy': self.tablebase is not None,
+        }
+        text = json.dumps(settings, sort_keys=True, default=str)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+    def _begin_search(self, board: chess.Board, time_limit: float, max_nodes: int) -> float:
+        """Лимиты, счетчики и ключи перед поиском от корня board; возвращает время старта"""
+        start = time.time()
+        self._deadline = start + time_limit if time_limit else None
+        self._node_limit = max_nodes
+        self.nodes = 0
+        self.qnodes = 0
+        self._pv = []
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.null_move_cutoffs = 0
+        self.lmr_researches = 0
+        self.futility_prunes = 0
+        self.see_prunes = 0
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # История стареет от хода к ходу
+        self.history = [value // 2 for value in self.history]
+        self.tt.new_search()
+        self._set_root(board)
+        self.last_depth, self.last_score, self.last_pv = 0, 0, []
+        return start
+
+    def analyse(self, board: chess.Board, multipv: int = 1, time_limit: float = None,
+                max_nodes: int = None, max_depth: int = None):
+        """Анализ позиции с несколькими главными вариантами.
+
+        Генератор: после каждой завершенной глубины выдает словарь
+        {'depth', 'nodes', 'time', 'lines'}, где lines - до multipv лучших
+        ходов корня по убыванию оценки: {'move', 'score', 'pv'}. Оценка -
+        за сторону, которая ходит. Прерванная глубина не выдается.
+        """
+        self.stop_ponder()
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            return
+        multipv = max(1, min(multipv, len(legal_moves)))
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_nodes = self.max_nodes if max_nodes is None else max_nodes
+        max_depth = self.max_depth if max_depth is None else max_depth
+
+        board = board.copy()
+        start = self._begin_search(board, time_limit, max_nodes)
+        lines = []
+        try:
+            for depth in range(1, max_depth + 1):
+                # Каждый следующий вариант ищется среди ходов, не вошедших в предыдущие;
+                # сортировку ведет вариант того же номера с прошлой глубины
+                new_lines = []
+                remaining = list(legal_moves)
+                try:
+                    for index in range(multipv):
+                        self._pv = lines[index]['pv'] if index < len(lines) else []
+                        # Корень в таблицу пишет только первый вариант: остальные
+                        # ищутся без лучших ходов
+                        value, move = self.search_root(board, remaining, depth, store=index == 0)
+                        # Продолжение - из записи позиции после хода (корень хранит только первый)
+                        board.push(move)
+                        pv = [move] + self._extract_pv(board, depth - 1)
+                        board.pop()
+                        new_lines.append({'move': move, 'score': value, 'pv': pv})
+                        remaining.remove(move)
+                except SearchTimeout:
+                    break
+                lines = sorted(new_lines, key=lambda line: line['score'], reverse=True)
+                self.last_depth, self.last_score, self.last_pv = depth, lines[0]['score'], lines[0]['pv']
+                if self.stats is not None:
+                    self.stats.record(self, depth)
+                yield {'depth': depth, 'nodes': self.nodes, 'time': time.time() - start, 'lines': lines}
+
+                if abs(lines[0]['score']) >= MATE_BOUND:
+                    break
+                if self._deadline is not None and time.time() - start > time_limit / 2:
+                    break
+        finally:
+            self._cancel.clear()
+
+    def stop(self):
+        """Прервать поиск из другого потока: get_move вернет лучший найденный
+        к этому моменту ход, analyse закончится.
+
+        Флаг снимается, когда поиск закончен, поэтому stop(), пришедший
+        раньше, чем поток поиска дошел до get_move, тоже прерывает поиск.
+        Вызов без поиска в работе прервет следующий.
+        """
+        self._cancel.set()
+        if self._smp is not None:
+            self._smp.stop_event.set()
+
+    def start_ponder(self, board: chess.Board) -> bool:
+        """Начать обдумывание на времени соперника.
+
+        board - позиция после нашего хода; в фоне ищется позиция после
+        ответа, ожидаемого по главному варианту. False - ждать нечего.
+        """
+        self.stop_ponder()
+        if self.threads > 1 or len(self.last_pv) < 2 or board.move_stack[-1:] != self.last_pv[:1]:
+            return False
+        expected = self.last_pv[1]
+        if not board.is_legal(expected):
+            return False
+        ponder_board = board.copy()
+        ponder_board.push(expected)
+        legal_moves = list(ponder_board.legal_moves)
+        if not legal_moves:
+            return False
+
+        self._ponder_key = self.zobrist(ponder_board)
+        self._ponder_start = time.time()
+        self._ponder_move = None
+        self._stop_event = threading.Event()
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, args=(ponder_board, legal_moves), daemon=True)
+        self._ponder_thread.start()
+        return True
+
+    def _ponder(self, board: chess.Board, legal_moves: list):
+        # Без лимита времени: остановит get_move или stop_ponder
+        self._ponder_move = self._search(board, legal_moves, None, None, self.max_depth)
+
+    def _finish_ponder(self, board: chess.Board, time_limit: float):
+        """Ход соперника сделан: при угадывании доиграть фоновый поиск
+        в пределах лимита, отсчитанного от начала обдумывания"""
+        if self.zobrist(board) != self._ponder_key:
+            self.ponder_misses += 1
+            self.stop_ponder()
+            return None
+
+        self.ponder_hits += 1
+        if time_limit:
+            self._ponder_thread.join(max(0.0, self._ponder_start + time_limit - time.time()))
+        else:
+            self._ponder_thread.join()
+        self.stop_ponder()
+        return self._ponder_move
+
+    def stop_ponder(self):
+        """Прервать обдумывание; таблица транспозиций остается прогретой"""
+        if self._ponder_thread is None:
+            return
+        self._stop_event.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        self._stop_event = None
+
+    def _smp_options(self) -> dict:
+        """Настройки поиска для MinMaxBot процессов Lazy SMP.
+
+        Книга не нужна (корень разбирает этот процесс), остальное должно
+        совпадать: иначе A/B-сравнение с threads > 1 меряет не то.
+        """
+        if self.cache is not None:
+            raise ValueError("Кэш позиций на диске не поддерживается при threads > 1")
+        if self.evaluator is not None:
+            try:
+                pickle.dumps(self.evaluator)
+            except Exception as e:
+                raise ValueError(f"Оценку {type(self.evaluator).__name__} нельзя передать процессам: {e}")
+        return {
+            'mobility': self.use_mobility,
+            'evaluator': self.evaluator,
+            'null_move': self.null_move,
+            'lmr': self.lmr,
+            'futility': self.futility,
+            'params_path': self.params_path,
+            'hard_deadline': self.hard_deadline,
+            'syzygy_path': self.tablebase.directory if self.tablebase is not None else None,
+        }
+
+    def _parallel_move(self, board: chess.Board, time_limit: float, max_nodes: int,
+                       max_depth: int) -> chess.Move:
+        """Lazy SMP: ход самой глубокой завершенной итерации среди процессов"""
+        from lazy_smp import LazySMP, WorkerError
+        if self._smp is None:
+            self._smp = LazySMP(self.threads, self.tt.size_mb, self._smp_options())
+        start = time.time()
+        try:
+            result = self._smp.search(board, time_limit, max_nodes, max_depth, cancel=self._cancel)
+        except WorkerError as e:
+            # Пул сломан: следующий поиск создаст новый, этот досчитывается здесь
+            logger.warning('%s; поиск в этом процессе', e)
+            self._close_smp()
+            if time_limit:
+                time_limit = max(time_limit - (time.time() - start), 0.01)
+            return self._search(board, list(board.legal_moves), time_limit, max_nodes, max_depth)
+        self.nodes = result['nodes']
+        self.qnodes = 0
+        self.last_depth, self.last_score, self.last_pv = result['depth'], result['score'], result['pv']
+        return result['move']
+
 
 class Chess_OOP():
     def __init__(self):
         self.board = chess.Board()
-        self.bot_white = MinMaxBot()
-        self.bot_black = MinMaxBot()
+        self.bot_white = MinMaxBot(book_path=default_book_path())
+        self.bot_black = MinMaxBot(book_path=default_book_path())
 
     def print_board(self):
         b0ard = self.board
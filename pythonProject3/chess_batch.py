@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+import chess
+import chess.pgn
+
+from bot_for_chess import MATE_BOUND, MATE_SCORE, MinMaxBot
+from chess_tournament import check_pool_config, parse_config
+
+# Сколько позиций на процесс держать в работе одновременно: вход читается
+# порциями, а не целиком
+CHUNK_PER_WORKER = 32
+# Как часто сбрасывать результаты на диск (в позициях)
+SYNC_EVERY = 100
+
+# Бот процесса-помощника
+_bot = None
+
+
+def read_positions(paths: list):
+    """Позиции из файлов по порядку: (идентификатор, FEN).
+
+    Строки FEN или EPD (идентификатор - из операции id); из партий PGN
+    берется каждая позиция основного варианта: "партия:полуход".
+    """
+    for path in paths:
+        name = os.path.basename(path)
+        with open(path, encoding='utf-8') as file:
+            if path.endswith('.pgn'):
+                for game_number in itertools.count(1):
+                    game = chess.pgn.read_game(file)
+                    if game is None:
+                        break
+                    board = game.board()
+                    yield f"{name}:{game_number}:0", board.fen()
+                    for ply, move in enumerate(game.mainline_moves(), 1):
+                        board.push(move)
+                        yield f"{name}:{game_number}:{ply}", board.fen()
+                continue
+
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                yield f"{name}:{line_number}", line
+
+
+def _init_worker(config: dict):
+    global _bot
+    _bot = MinMaxBot(**config)
+
+
+def analyse_position(task) -> dict:
+    """Анализ одной позиции в процессе-помощнике"""
+    position_id, text, time_limit, max_nodes, max_depth = task
+    record = {'id': position_id}
+    try:
+        try:
+            board = chess.Board(text)
+        except ValueError:
+            board, operations = chess.Board.from_epd(text)
+            record['id'] = operations.get('id', position_id)
+        record['fen'] = board.fen()
+        if board.is_game_over():
+            record['result'] = board.result()
+            return record
+
+        # Каждая позиция - с чистой таблицей: результат не зависит от порядка обработки
+        _bot.new_game()
+        start = time.time()
+        move = _bot.get_move(board, time_limit=time_limit, max_nodes=max_nodes, max_depth=max_depth)
+        record.update({
+            'move': move.uci(),
+            'san': board.san(move),
+            'depth': _bot.last_depth,
+            'nodes': _bot.nodes,
+            'time': round(time.time() - start, 3),
+            'pv': [pv_move.uci() for pv_move in _bot.last_pv],
+        })
+        # Оценка - за сторону, которая ходит
+        score = _bot.last_score
+        if abs(score) >= MATE_BOUND:
+            moves = int((MATE_SCORE - abs(score) + 1) // 2)
+            record['mate'] = moves if score > 0 else -moves
+        else:
+            record['score'] = int(score)
+    except Exception as e:
+        record['error'] = str(e)
+    return record
+
+
+def completed_count(path: str) -> int:
+    """Сколько результатов уже записано; недописанная последняя строка отрезается.
+
+    Результаты пишутся строго в порядке входа, поэтому их число и есть
+    контрольная точка: при перезапуске столько позиций пропускается.
+    """
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    valid_size = 0
+    with open(path, 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            count += 1
+            valid_size += len(line)
+    if valid_size != os.path.getsize(path):
+        with open(path, 'r+b') as file:
+            file.truncate(valid_size)
+    return count
+
+
+def run_batch(paths: list, output: str, config: dict = None, workers: int = None, time_limit: float = 1.0,
+              max_nodes: int = None, max_depth: int = None) -> int:
+    """Проанализировать все позиции, дописывая NDJSON в output; возвращает число новых результатов"""
+    check_pool_config(config or {})
+    done = completed_count(output)
+    if done:
+        print(f"Продолжение: {done} позиций уже посчитано")
+    positions = itertools.islice(read_positions(paths), done, None)
+    workers = workers or os.cpu_count() or 1
+
+    written = 0
+    start = time.time()
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config or {},))
+    try:
+        with open(output, 'a', encoding='utf-8') as file:
+            while True:
+                chunk = [(position_id, text, time_limit, max_nodes, max_depth)
+                         for position_id, text in itertools.islice(positions, workers * CHUNK_PER_WORKER)]
+                if not chunk:
+                    break
+                # imap отдает результаты в порядке входа
+                for record in pool.imap(analyse_position, chunk):
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                    written += 1
+                    if written % SYNC_EVERY == 0:
+                        file.flush()
+                        os.fsync(file.fileno())
+                        elapsed = time.time() - start
+                        print(f"Позиций: {done + written} ({written / elapsed:.1f} в секунду)")
+                file.flush()
+                os.fsync(file.fileno())
+    finally:
+        pool.terminate()
+        pool.join()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Пакетный анализ позиций (FEN/EPD/PGN -> NDJSON)')
+    parser.add_argument('inputs', nargs='+', help='Файлы позиций: строки FEN/EPD или партии .pgn')
+    parser.add_argument('--output', required=True, help='Файл результатов NDJSON (дописывается при продолжении)')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию - все ядра)')
+    parser.add_argument('--time', type=float, default=1.0, help='Время на позицию, с (0 - без лимита)')
+    parser.add_argument('--nodes', type=int, default=None, help='Лимит узлов на позицию')
+    parser.add_argument('--depth', type=int, default=None, help='Глубина на позицию')
+    parser.add_argument('--config', default='', help='Настройки бота: "hash_mb=32,lmr=False"')
+
+    args = parser.parse_args()
+
+    start = time.time()
+    count = run_batch(args.inputs, args.output, parse_config(args.config), workers=args.workers,
+                      time_limit=args.time, max_nodes=args.nodes, max_depth=args.depth)
+    print(f"Готово: {count} позиций за {time.time() - start:.0f} с, результаты в {args.output}")
\ No newline at end of file
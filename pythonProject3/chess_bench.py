@@ -0,0 +1,144 @@
+import argparse
+import time
+
+import chess
+
+from bot_for_chess import MinMaxBot, see
+
+# Набор для bench: дебют, миттельшпиль, тактика, эндшпиль. Менять нельзя -
+# иначе сигнатуры узлов разных версий станут несравнимы
+BENCH_POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2PP1N2/PP3PPP/RNBQ1RK1 w - - 0 7",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "2rq1rk1/pp1bppbp/2np1np1/8/3NP3/1BN1BP2/PPPQ2PP/2KR3R b - - 0 11",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "8/8/4k3/3p4/3P4/4K3/8/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1",
+]
+
+# Эталонные числа perft по глубинам 1, 2, 3, ... (chessprogramming.org)
+PERFT_POSITIONS = [
+    (chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+]
+
+
+# Позиции с большим количеством взятий и разменов
+SEE_POSITIONS = [
+    "1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1",
+    "1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "rnbqkb1r/pp1p1ppp/2p5/4P3/2B5/8/PPP1NnPP/RNBQK2R w KQkq - 0 6",
+]
+
+
+def see_benchmark(iterations: int = 2000):
+    """Микробенчмарк SEE: все взятия набора позиций, много раз подряд"""
+    piece_values = MinMaxBot(params_path='').piece_values
+    captures = []
+    for fen in SEE_POSITIONS:
+        board = chess.Board(fen)
+        captures.extend((board, move) for move in board.generate_legal_captures())
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for board, move in captures:
+            see(board, move, piece_values)
+    elapsed = time.perf_counter() - start
+
+    calls = iterations * len(captures)
+    print(f"SEE: {len(captures)} взятий x {iterations} = {calls} вызовов за {elapsed:.2f} с")
+    print(f"     {elapsed / calls * 1e6:.2f} мкс на вызов, {int(calls / elapsed)} вызовов/с")
+
+
+def bench(depth: int = 4):
+    """Поиск набора позиций на фиксированную глубину.
+
+    Каждая позиция ищется новым ботом без книги и с весами по умолчанию
+    (не из eval_params.json), поэтому число узлов детерминировано: его
+    сумма - сигнатура версии поиска. Изменилась сигнатура - изменилось
+    дерево поиска; NPS показывает скорость.
+    """
+    total_nodes = 0
+    total_time = 0.0
+    for number, fen in enumerate(BENCH_POSITIONS, 1):
+        bot = MinMaxBot(params_path='')
+        start = time.perf_counter()
+        move = bot.get_move(chess.Board(fen), time_limit=0, max_depth=depth)
+        elapsed = time.perf_counter() - start
+        total_nodes += bot.nodes
+        total_time += elapsed
+        print(f"{number:2d}. {move.uci():6s} оценка {bot.last_score:8.0f} узлов {bot.nodes:9d} за {elapsed:6.2f} с")
+        bot.close()
+
+    print(f"Глубина: {depth}")
+    print(f"Узлов:   {total_nodes}")
+    print(f"Время:   {total_time:.2f} с")
+    print(f"NPS:     {int(total_nodes / total_time) if total_time else 0}")
+    return total_nodes
+
+
+def perft(board: chess.Board, depth: int) -> int:
+    """Число листьев дерева легальных ходов на глубину depth"""
+    if depth == 1:
+        return board.legal_moves.count()
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def perft_check(depth: int = 3) -> bool:
+    """Сверка генератора ходов с эталонными числами и замер его скорости"""
+    ok = True
+    total_nodes = 0
+    total_time = 0.0
+    for fen, counts in PERFT_POSITIONS:
+        board = chess.Board(fen)
+        for current_depth in range(1, min(depth, len(counts)) + 1):
+            start = time.perf_counter()
+            nodes = perft(board, current_depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            expected = counts[current_depth - 1]
+            status = "ok" if nodes == expected else f"ОШИБКА, ожидалось {expected}"
+            ok = ok and nodes == expected
+            print(f"perft({current_depth}) {nodes:9d} за {elapsed:6.2f} с  {status}  {fen}")
+
+    print(f"Листьев: {total_nodes}, {int(total_nodes / total_time) if total_time else 0} в секунду")
+    print("Все числа совпали" if ok else "Есть расхождения!")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Замеры скорости шахматного бота')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    see_parser = subparsers.add_parser('see', help='Микробенчмарк статического размена (SEE)')
+    see_parser.add_argument('--iterations', type=int, default=2000, help='Число повторов набора взятий')
+
+    bench_parser = subparsers.add_parser('bench', help='Поиск набора позиций: сигнатура узлов и NPS')
+    bench_parser.add_argument('--depth', type=int, default=4, help='Глубина поиска')
+
+    perft_parser = subparsers.add_parser('perft', help='Проверка генератора ходов по эталонным числам')
+    perft_parser.add_argument('--depth', type=int, default=3, help='Максимальная глубина perft')
+
+    args = parser.parse_args()
+
+    if args.command == 'see':
+        see_benchmark(args.iterations)
+    elif args.command == 'bench':
+        bench(args.depth)
+    elif args.command == 'perft':
+        if not perft_check(args.depth):
+            raise SystemExit(1)
\ No newline at end of file
@@ -88,7 +88,12 @@ class ChessClient:
             self.color = message.get('color')
             print(f"\n✓ Комната создана: {self.room_id}")
             print(f"✓ Вы играете белыми")
-            print("✓ Ожидаем второго игрока...")
+            if message.get('vs_bot'):
+                self.opponent = message.get('opponent')
+                self.game_started = True
+                print(f"✓ Ваш соперник: {self.opponent}")
+            else:
+                print("✓ Ожидаем второго игрока...")
             print("Введите 'chat [сообщение]' для отправки сообщения")
 
         elif msg_type == 'player_joined':
@@ -251,7 +256,8 @@ class ChessClient:
         print("1. Создать комнату")
         print("2. Присоединиться к комнате")
         print("3. Обновить список комнат")
-        print("4. Выйти")
+        print("4. Играть с ботом")
+        print("5. Выйти")
         print("=" * 50)
 
         choice = input("Выберите действие: ").strip()
@@ -274,6 +280,12 @@ class ChessClient:
                 'username': self.username
             })
         elif choice == '4':
+            self.send({
+                'type': 'create_room',
+                'username': self.username,
+                'vs_bot': True
+            })
+        elif choice == '5':
             print("Выход...")
             self.client.close()
             os._exit(0)
@@ -1,110 +1,23 @@
 import pygame
 import chess
-import random
 import sys
+import threading
 
-pygame.init()
-
-
-class MinMaxBot:
-    def __init__(self):
-        self.name = "Бот (макс. сложность)"
-        self.piece_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 20000
-        }
+from bot_for_chess import MinMaxBot, default_book_path
 
-    def evaluate_position(self, board: chess.Board) -> float:
-        if board.is_checkmate():
-            return -100000 if board.turn else 100000
-        if board.is_stalemate() or board.is_insufficient_material():
-            return 0
-        score = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                value = self.piece_values[piece.piece_type]
-                if piece.color == chess.WHITE:
-                    score += value
-                else:
-                    score -= value
-                file, rank = chess.square_file(square), chess.square_rank(square)
-                center_bonus = 0
-                if 2 <= file <= 5 and 2 <= rank <= 5:
-                    center_bonus = 10 * value / 100
-                elif 3 <= file <= 4 and 3 <= rank <= 4:
-                    center_bonus = 20 * value / 100
-                if piece.color == chess.WHITE:
-                    score += center_bonus
-                else:
-                    score -= center_bonus
-        score += len(list(board.legal_moves)) * 5 * (1 if board.turn else -1)
-        king_square = board.king(board.turn)
-        if king_square:
-            file, rank = chess.square_file(king_square), chess.square_rank(king_square)
-            if rank == (0 if board.turn else 7):
-                score += -30 * (1 if board.turn else -1)
-            elif file in [0, 7] or rank in [0, 7]:
-                score += -20 * (1 if board.turn else -1)
-        if board.is_check():
-            score += -50 * (1 if board.turn else -1)
-        return score
-
-    def minimax(self, board: chess.Board, depth: int, alpha: float, beta: float, maximizing: bool) -> float:
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_position(board)
-        legal_moves = list(board.legal_moves)
-        if maximizing:
-            max_eval = -float('inf')
-            for move in legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, False)
-                board.pop()
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in legal_moves:
-                board.push(move)
-                eval = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
-
-    def get_move(self, board: chess.Board) -> chess.Move:
-        legal_moves = list(board.legal_moves)
-        if not legal_moves:
-            raise Exception("Нет возможных ходов")
-        best_move = None
-        best_value = -float('inf')
-        depth = 3
-        for move in legal_moves:
-            board.push(move)
-            move_value = self.minimax(board, depth - 1, -float('inf'), float('inf'), False)
-            board.pop()
-            if move_value > best_value:
-                best_value = move_value
-                best_move = move
-            elif move_value == best_value and random.random() > 0.5:
-                best_move = move
-        return best_move
+pygame.init()
 
 
 class ChessPygame:
     def __init__(self):
         self.board = chess.Board()
-        self.bot_white = MinMaxBot()
-        self.bot_black = MinMaxBot()
+        # Жесткий лимит времени: окно не ждет бота дольше его лимита на ход
+        self.bot_white = MinMaxBot(book_path=default_book_path(), hard_deadline=True)
+        self.bot_black = MinMaxBot(book_path=default_book_path(), hard_deadline=True)
+        # Бот думает в отдельном потоке, окно в это время отвечает на события
+        self.search_thread = None
+        self.search_bot = None
+        self.search_result = None
         self.screen_size = 400
         self.cell_size = self.screen_size // 8
         self.screen = pygame.display.set_mode((self.screen_size, self.screen_size + 150))
@@ -247,35 +160,58 @@ class ChessPygame:
             self.info_text = ""
         return False
 
+    def think(self, bot, board):
+        """Поиск хода в фоновом потоке"""
+        try:
+            self.search_result = bot.get_move(board)
+        except Exception as e:
+            self.search_result = e
+
+    def stop_thinking(self):
+        """Прервать поиск и закрыть ботов (закрытие окна, новая партия)"""
+        if self.search_thread is not None:
+            self.search_bot.stop()
+            self.search_thread.join()
+            self.search_thread = None
+        self.bot_white.close()
+        self.bot_black.close()
+
     def run(self):
         clock = pygame.time.Clock()
-        bot_thinking = False
 
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.stop_thinking()
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r and self.game_over:
+                        self.stop_thinking()
                         self.__init__()
                         continue
                     if event.key == pygame.K_ESCAPE:
+                        self.stop_thinking()
                         pygame.quit()
                         sys.exit()
 
-            if not self.game_over and not bot_thinking:
-                bot_thinking = True
-                pygame.time.set_timer(pygame.USEREVENT, 500)
+            if not self.game_over and self.search_thread is None:
+                self.search_bot = self.bot_white if self.board.turn else self.bot_black
+                self.search_result = None
+                self.search_thread = threading.Thread(target=self.think, args=(self.search_bot, self.board.copy()),
+                                                      daemon=True)
+                self.search_thread.start()
 
             self.screen.fill((40, 40, 40))
             self.draw_board()
             self.draw_info()
 
-            if bot_thinking and not self.game_over:
+            if self.search_thread is not None and not self.search_thread.is_alive():
+                self.search_thread = None
                 try:
-                    current_bot = self.bot_white if self.board.turn else self.bot_black
-                    move = current_bot.get_move(self.board)
+                    if isinstance(self.search_result, Exception):
+                        raise self.search_result
+                    move = self.search_result
                     self.board.push(move)
 
                     try:
@@ -290,9 +226,6 @@ class ChessPygame:
                     self.message = f"Ошибка: {e}"
                     self.game_over = True
 
-                bot_thinking = False
-                pygame.time.set_timer(pygame.USEREVENT, 0)
-
             pygame.display.flip()
             clock.tick(30)
 
@@ -5,11 +5,14 @@ import chess
 import sys
 from datetime import datetime
 
+from bot_for_chess import MinMaxBot, default_book_path
+
 
 class ChessServer:
-    def __init__(self, host='0.0.0.0', port=5555):
+    def __init__(self, host='0.0.0.0', port=5555, bot_time_limit=2.0):
         self.host = host
         self.port = port
+        self.bot_time_limit = bot_time_limit
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server.bind((self.host, self.port))
@@ -44,7 +47,7 @@ class ChessServer:
             # Отправляем список комнат
             rooms_info = []
             for room_id, clients in self.rooms.items():
-                if len(clients) < 2:  # Комната не заполнена
+                if len(clients) < 2 and 'bot' not in self.room_counters[room_id]:  # Комната не заполнена
                     player = self.usernames[clients[0]] if clients else "Ожидание"
                     rooms_info.append({
                         'room_id': room_id,
@@ -74,7 +77,9 @@ class ChessServer:
                             'move_history': [],
                             'players': {0: client},  # Белые - 0
                             'current_turn': chess.WHITE,
-                            'game_over': False
+                            'game_over': False,
+                            # Доску меняют потоки обоих клиентов и поток бота
+                            'lock': threading.Lock()
                         }
 
                         response = {
@@ -83,14 +88,29 @@ class ChessServer:
                             'color': 'white',
                             'username': username
                         }
+                        if message.get('vs_bot'):
+                            # Бот играет черными и думает на времени соперника
+                            bot = MinMaxBot(time_limit=self.bot_time_limit, book_path=default_book_path(),
+                                            hard_deadline=True)
+                            self.room_counters[room_id]['bot'] = bot
+                            response['vs_bot'] = True
+                            response['opponent'] = bot.name
                         client.send(json.dumps(response).encode('utf-8'))
 
+                        if message.get('vs_bot'):
+                            self.broadcast_to_room(room_id, {
+                                'type': 'game_started',
+                                'white': username,
+                                'black': response['opponent']
+                            })
+
                         print(f"[SERVER] Комната {room_id} создана пользователем {username}")
 
                     elif msg_type == 'join_room':
                         room_id = message.get('room_id')
 
-                        if room_id in self.rooms and len(self.rooms[room_id]) < 2:
+                        if (room_id in self.rooms and len(self.rooms[room_id]) < 2
+                                and 'bot' not in self.room_counters[room_id]):
                             self.rooms[room_id].append(client)
                             room_data = self.room_counters[room_id]
                             room_data['players'][1] = client  # Черные - 1
@@ -134,62 +154,75 @@ class ChessServer:
                         move_uci = message.get('move')
                         player_color = message.get('color')
 
-                        if room_id in self.room_counters:
-                            room_data = self.room_counters[room_id]
-
-                            # Проверяем, чей сейчас ход
-                            expected_color = 'white' if room_data['current_turn'] == chess.WHITE else 'black'
-                            if player_color != expected_color:
-                                client.send(json.dumps({
-                                    'type': 'error',
-                                    'message': 'Сейчас не ваш ход!'
-                                }).encode('utf-8'))
-                                continue
-
-                            # Пробуем сделать ход
-                            try:
-                                move = chess.Move.from_uci(move_uci)
-                                if move in room_data['board'].legal_moves:
-                                    room_data['board'].push(move)
-                                    room_data['move_history'].append(move_uci)
-
-                                    # Меняем очередь хода
-                                    room_data['current_turn'] = not room_data['current_turn']
-
-                                    # Получаем состояние доски
-                                    board_state = self.get_board_state(room_data['board'])
-                                    move_san = room_data['board'].san(move)
-
-                                    # Проверяем окончание игры
-                                    game_over = room_data['board'].is_game_over()
-                                    result = room_data['board'].result() if game_over else '*'
-
-                                    if game_over:
-                                        room_data['game_over'] = True
-
-                                    # Отправляем ход всем игрокам в комнате
-                                    self.broadcast_to_room(room_id, {
-                                        'type': 'move_made',
-                                        'move': move_uci,
-                                        'move_san': move_san,
-                                        'board_state': board_state,
-                                        'next_turn': 'white' if room_data['current_turn'] == chess.WHITE else 'black',
-                                        'game_over': game_over,
-                                        'result': result,
-                                        'player': username
-                                    })
-
-                                    print(f"[SERVER] {username} сделал ход {move_san} в комнате {room_id}")
-                                else:
+                        room_data = self.room_counters.get(room_id)
+                        if room_data is not None:
+                            with room_data['lock']:
+                                # Проверяем, чей сейчас ход. С ботом ходит только создатель
+                                # комнаты (белые): очередь черных - бот думает, и его ход
+                                # сменит очередь под этой же блокировкой
+                                expected_color = 'white' if room_data['current_turn'] == chess.WHITE else 'black'
+                                if 'bot' in room_data and (client is not room_data['players'][0] or
+                                                           room_data['current_turn'] != chess.WHITE):
+                                    expected_color = None
+                                if player_color != expected_color:
+                                    client.send(json.dumps({
+                                        'type': 'error',
+                                        'message': 'Сейчас не ваш ход!'
+                                    }).encode('utf-8'))
+                                    continue
+
+                                # Пробуем сделать ход
+                                try:
+                                    move = chess.Move.from_uci(move_uci)
+                                    if move in room_data['board'].legal_moves:
+                                        # Нотация считается до хода: после него ход уже нелегален
+                                        move_san = room_data['board'].san(move)
+                                        room_data['board'].push(move)
+                                        room_data['move_history'].append(move_uci)
+
+                                        # Меняем очередь хода
+                                        room_data['current_turn'] = not room_data['current_turn']
+
+                                        # Получаем состояние доски
+                                        board_state = self.get_board_state(room_data['board'])
+
+                                        # Проверяем окончание игры
+                                        game_over = room_data['board'].is_game_over()
+                                        result = room_data['board'].result() if game_over else '*'
+
+                                        if game_over:
+                                            room_data['game_over'] = True
+
+                                        # Отправляем ход всем игрокам в комнате
+                                        self.broadcast_to_room(room_id, {
+                                            'type': 'move_made',
+                                            'move': move_uci,
+                                            'move_san': move_san,
+                                            'board_state': board_state,
+                                            'next_turn': 'white' if room_data['current_turn'] == chess.WHITE else 'black',
+                                            'game_over': game_over,
+                                            'result': result,
+                                            'player': username
+                                        })
+
+                                        print(f"[SERVER] {username} сделал ход {move_san} в комнате {room_id}")
+
+                                        if 'bot' in room_data and not game_over:
+                                            # Бот думает в своем потоке: сдача или выход игрока
+                                            # обрабатываются сразу и прерывают поиск
+                                            room_data['bot_thread'] = threading.Thread(
+                                                target=self.make_bot_move, args=(room_id,), daemon=True)
+                                            room_data['bot_thread'].start()
+                                    else:
+                                        client.send(json.dumps({
+                                            'type': 'error',
+                                            'message': 'Неверный ход!'
+                                        }).encode('utf-8'))
+                                except Exception as e:
                                     client.send(json.dumps({
                                         'type': 'error',
-                                        'message': 'Неверный ход!'
+                                        'message': f'Ошибка хода: {str(e)}'
                                     }).encode('utf-8'))
-                            except Exception as e:
-                                client.send(json.dumps({
-                                    'type': 'error',
-                                    'message': f'Ошибка хода: {str(e)}'
-                                }).encode('utf-8'))
 
                     elif msg_type == 'get_board':
                         room_id = message.get('room_id')
@@ -226,10 +259,7 @@ class ChessServer:
                                 'winner': winner
                             })
                             # Удаляем комнату после окончания игры
-                            if room_id in self.rooms:
-                                del self.rooms[room_id]
-                            if room_id in self.room_counters:
-                                del self.room_counters[room_id]
+                            self.close_room(room_id)
 
                     elif msg_type == 'leave_room':
                         room_id = message.get('room_id')
@@ -243,9 +273,7 @@ class ChessServer:
                                 })
                                 # Если в комнате никого не осталось, удаляем её
                                 if not self.rooms[room_id]:
-                                    del self.rooms[room_id]
-                                    if room_id in self.room_counters:
-                                        del self.room_counters[room_id]
+                                    self.close_room(room_id)
 
                 except json.JSONDecodeError:
                     continue
@@ -273,9 +301,7 @@ class ChessServer:
 
                     # Если в комнате никого не осталось, удаляем её
                     if not clients:
-                        del self.rooms[room_id]
-                        if room_id in self.room_counters:
-                            del self.room_counters[room_id]
+                        self.close_room(room_id)
 
             if client in self.usernames:
                 del self.usernames[client]
@@ -283,6 +309,58 @@ class ChessServer:
             client.close()
             print(f"[SERVER] Отключение от {address}")
 
+    def make_bot_move(self, room_id):
+        """Ход бота; после него бот думает на времени соперника"""
+        room_data = self.room_counters.get(room_id)
+        if room_data is None:
+            # Комнату закрыли раньше, чем поток начал работу
+            return
+        bot = room_data['bot']
+        with room_data['lock']:
+            board = room_data['board'].copy()
+
+        # Если соперник сыграл ожидаемый ход, ответ готов из фонового поиска
+        move = bot.get_move(board)
+        with room_data['lock']:
+            if self.room_counters.get(room_id) is not room_data:
+                # Комнату закрыли во время поиска
+                return
+            board = room_data['board']
+            move_san = board.san(move)
+            board.push(move)
+            room_data['move_history'].append(move.uci())
+            room_data['current_turn'] = not room_data['current_turn']
+
+            game_over = board.is_game_over()
+            if game_over:
+                room_data['game_over'] = True
+
+            self.broadcast_to_room(room_id, {
+                'type': 'move_made',
+                'move': move.uci(),
+                'move_san': move_san,
+                'board_state': self.get_board_state(board),
+                'next_turn': 'white' if room_data['current_turn'] == chess.WHITE else 'black',
+                'game_over': game_over,
+                'result': board.result() if game_over else '*',
+                'player': bot.name
+            })
+            print(f"[SERVER] {bot.name} сделал ход {move_san} в комнате {room_id}")
+
+            if not game_over:
+                bot.start_ponder(board.copy())
+
+    def close_room(self, room_id):
+        """Удалить комнату и остановить ее бота"""
+        room_data = self.room_counters.pop(room_id, None)
+        self.rooms.pop(room_id, None)
+        if room_data is not None and 'bot' in room_data:
+            room_data['bot'].stop()
+            bot_thread = room_data.get('bot_thread')
+            if bot_thread is not None and bot_thread is not threading.current_thread():
+                bot_thread.join()
+            room_data['bot'].close()
+
     def get_board_state(self, board):
         """Получить состояние доски в удобном формате"""
         return {
@@ -318,8 +396,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Шахматный сервер')
     parser.add_argument('--host', default='0.0.0.0', help='Хост сервера')
     parser.add_argument('--port', type=int, default=5555, help='Порт сервера')
+    parser.add_argument('--bot-time', type=float, default=2.0, help='Время бота на ход, с')
 
     args = parser.parse_args()
 
-    server = ChessServer(host=args.host, port=args.port)
+    server = ChessServer(host=args.host, port=args.port, bot_time_limit=args.bot_time)
     server.start()
\ No newline at end of file
@@ -0,0 +1,239 @@
+import argparse
+import ast
+import math
+import multiprocessing
+import time
+
+import chess
+import chess.pgn
+
+from bot_for_chess import MinMaxBot
+
+# Короткие дебюты: каждый играется парой партий со сменой цвета
+OPENINGS = [
+    "e4 e5 Nf3 Nc6 Bb5",
+    "e4 e5 Nf3 Nc6 Bc4 Bc5",
+    "e4 c5 Nf3 d6",
+    "e4 c5 Nc3 Nc6",
+    "e4 e6 d4 d5",
+    "e4 c6 d4 d5",
+    "e4 d5 exd5 Qxd5",
+    "e4 Nf6",
+    "d4 d5 c4 e6",
+    "d4 d5 c4 c6",
+    "d4 Nf6 c4 g6",
+    "d4 Nf6 c4 e6 Nc3 Bb4",
+    "d4 f5",
+    "c4 e5",
+    "Nf3 d5 g3",
+    "b3 e5",
+]
+
+# Партия без результата за это число полуходов засчитывается ничьей
+MAX_PLIES = 300
+
+# Боты процесса-помощника: создаются один раз, между партиями сбрасываются
+_bots = {}
+
+
+def parse_config(text: str) -> dict:
+    """Настройки MinMaxBot из строки вида "lmr=False,hash_mb=32" """
+    config = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, _, value = item.partition('=')
+        try:
+            config[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            config[key.strip()] = value.strip()
+    return config
+
+
+def check_pool_config(config: dict):
+    """Процессы пула - демоны и не могут запускать свои: Lazy SMP (threads > 1)
+    в них не заработает, поэтому такие настройки отвергаются сразу"""
+    if config.get('threads', 1) > 1:
+        raise ValueError("threads > 1 не поддерживается: партии и так идут в отдельных процессах (--workers)")
+
+
+def load_openings(path: str = None) -> list:
+    """Стартовые позиции: встроенные дебюты или файл FEN/EPD (по позиции в строке)"""
+    boards = []
+    if path is None:
+        for line in OPENINGS:
+            board = chess.Board()
+            for san in line.split():
+                board.push_san(san)
+            boards.append(board)
+        return boards
+
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                boards.append(chess.Board(line))
+            except ValueError:
+                boards.append(chess.Board.from_epd(line)[0])
+    return boards
+
+
+def _init_worker(config_a: dict, config_b: dict):
+    _bots['A'] = MinMaxBot(**config_a)
+    _bots['B'] = MinMaxBot(**config_b)
+
+
+def play_game(task) -> tuple:
+    """Одна партия в процессе-помощнике: (номер, очки A, PGN)"""
+    index, opening, a_white, time_limit, max_nodes = task
+    white, black = ('A', 'B') if a_white else ('B', 'A')
+    for bot in _bots.values():
+        bot.new_game()
+
+    board = opening.copy()
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_PLIES:
+        bot = _bots[white] if board.turn == chess.WHITE else _bots[black]
+        board.push(bot.get_move(board, time_limit=time_limit, max_nodes=max_nodes))
+
+    result = board.result(claim_draw=True)
+    if result == '*':
+        result = '1/2-1/2'
+    white_score = {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers['Event'] = 'MinMaxBot A/B'
+    game.headers['Round'] = str(index + 1)
+    game.headers['White'] = white
+    game.headers['Black'] = black
+    game.headers['Result'] = result
+    return index, white_score if a_white else 1.0 - white_score, str(game)
+
+
+def expected_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def elo_from_score(score: float) -> float:
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """Логарифм отношения правдоподобия гипотез elo1 и elo0
+    (нормальное приближение триномиальной модели, как в fishtest)"""
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - score ** 2
+    if variance <= 0:
+        return 0.0
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def elo_summary(wins: int, draws: int, losses: int) -> tuple:
+    """Разница в Эло (A минус B) и полуширина 95% интервала"""
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - score ** 2
+    margin = 1.96 * math.sqrt(max(variance, 0.0) / games)
+    elo = elo_from_score(score)
+    return elo, (elo_from_score(score + margin) - elo_from_score(score - margin)) / 2
+
+
+def run_tournament(config_a: dict, config_b: dict, games: int = 1000, workers: int = None,
+                   time_limit: float = 0.1, max_nodes: int = None, openings: list = None,
+                   pgn_path: str = None, elo0: float = 0.0, elo1: float = 5.0,
+                   alpha: float = 0.05, beta: float = 0.05) -> dict:
+    """Матч двух настроек MinMaxBot с последовательным тестом (SPRT).
+
+    Партии идут парами: дебют один, цвета меняются. Матч заканчивается,
+    когда LLR выходит за границы теста или сыграны все партии.
+    """
+    check_pool_config(config_a)
+    check_pool_config(config_b)
+    openings = openings or load_openings()
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    tasks = [(index, openings[index // 2 % len(openings)], index % 2 == 0, time_limit, max_nodes)
+             for index in range(games)]
+
+    wins = draws = losses = 0
+    llr = 0.0
+    verdict = None
+    start = time.time()
+    pgn_file = open(pgn_path, 'w', encoding='utf-8') if pgn_path else None
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config_a, config_b))
+    try:
+        for index, score, pgn in pool.imap_unordered(play_game, tasks):
+            if score == 1.0:
+                wins += 1
+            elif score == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            if pgn_file is not None:
+                pgn_file.write(pgn + '\n\n')
+                pgn_file.flush()
+
+            llr = sprt_llr(wins, draws, losses, elo0, elo1)
+            played = wins + draws + losses
+            elo, margin = elo_summary(wins, draws, losses)
+            print(f"Партий {played:5d}: +{wins} ={draws} -{losses}  "
+                  f"Эло {elo:+.1f} ± {margin:.1f}  LLR {llr:+.2f} [{lower:.2f}, {upper:.2f}]")
+            if llr >= upper:
+                verdict = 'H1'
+                break
+            if llr <= lower:
+                verdict = 'H0'
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+        if pgn_file is not None:
+            pgn_file.close()
+
+    elo, margin = elo_summary(wins, draws, losses) if wins + draws + losses else (0.0, 0.0)
+    return {
+        'games': wins + draws + losses,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'elo': elo,
+        'elo_margin': margin,
+        'llr': llr,
+        'verdict': verdict,
+        'time': time.time() - start,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Матч двух настроек бота с SPRT')
+    parser.add_argument('--a', default='', help='Настройки бота A: "lmr=False,hash_mb=32"')
+    parser.add_argument('--b', default='', help='Настройки бота B (эталон)')
+    parser.add_argument('--games', type=int, default=1000, help='Максимум партий')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов (по умолчанию - все ядра)')
+    parser.add_argument('--time', type=float, default=0.1, help='Время на ход, с')
+    parser.add_argument('--nodes', type=int, default=None, help='Лимит узлов на ход')
+    parser.add_argument('--openings', default=None, help='Файл стартовых позиций FEN/EPD')
+    parser.add_argument('--pgn', default=None, help='Куда записать партии')
+    parser.add_argument('--elo0', type=float, default=0.0, help='Эло гипотезы H0')
+    parser.add_argument('--elo1', type=float, default=5.0, help='Эло гипотезы H1')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    summary = run_tournament(parse_config(args.a), parse_config(args.b), games=args.games,
+                             workers=args.workers, time_limit=args.time, max_nodes=args.nodes,
+                             openings=load_openings(args.openings), pgn_path=args.pgn,
+                             elo0=args.elo0, elo1=args.elo1, alpha=args.alpha, beta=args.beta)
+
+    print("-" * 50)
+    print(f"Партий: {summary['games']} (+{summary['wins']} ={summary['draws']} -{summary['losses']}) "
+          f"за {summary['time']:.0f} с")
+    print(f"Разница Эло (A - B): {summary['elo']:+.1f} ± {summary['elo_margin']:.1f}")
+    if summary['verdict'] == 'H1':
+        print(f"SPRT: H1 принята - A сильнее на {args.elo1} Эло")
+    elif summary['verdict'] == 'H0':
+        print(f"SPRT: H0 принята - A не сильнее на {args.elo1} Эло")
+    else:
+        print(f"SPRT: решения нет, LLR {summary['llr']:+.2f}")
\ No newline at end of file
@@ -0,0 +1,187 @@
+import argparse
+import json
+import re
+import time
+
+import chess
+import chess.pgn
+import numpy as np
+
+from bot_for_chess import DEFAULT_PARAMS, EVAL_WEIGHTS, MinMaxBot
+from numpy_evaluator import NumpyEvaluator
+
+# Результат партии в строке позиции: 1-0 / 0-1 / 1/2-1/2 или [1.0] / [0.5] / [0.0]
+RESULT_RE = re.compile(r'(1-0|0-1|1/2-1/2|\[(?:1\.0|0\.5|0\.0)\])')
+RESULTS = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5, '[1.0]': 1.0, '[0.5]': 0.5, '[0.0]': 0.0}
+
+# Из партий PGN не берем дебют (он из книги или набора) и позиции под шахом
+PGN_SKIP_PLIES = 8
+
+WEIGHT_NAMES = list(EVAL_WEIGHTS)
+
+
+def read_positions(path: str):
+    """Позиции с результатом партии (для белых): строки FEN/EPD с результатом или партии PGN"""
+    if path.endswith('.pgn'):
+        with open(path, encoding='utf-8') as file:
+            while True:
+                game = chess.pgn.read_game(file)
+                if game is None:
+                    break
+                result = RESULTS.get(game.headers.get('Result'))
+                if result is None:
+                    continue
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    board.push(move)
+                    if ply >= PGN_SKIP_PLIES and not board.is_check():
+                        yield board.copy(stack=False), result
+        return
+
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            match = RESULT_RE.search(line)
+            if match is None:
+                continue
+            fen = line[:match.start()].strip().rstrip(';|,').strip()
+            try:
+                board = chess.Board(fen)
+            except ValueError:
+                board = chess.Board.from_epd(fen)[0]
+            yield board, RESULTS[match.group(1)]
+
+
+def positional_features(bot: MinMaxBot, board: chess.Board) -> list:
+    """Признаки позиционной оценки: вклад каждого веса при единичном значении.
+
+    Считаются самим ботом (_positional_score с единичными весами), чтобы
+    настройщик и поиск не расходились в формулах.
+    """
+    in_check = board.is_check()
+    mobility = bot._pseudo_mobility(board) if bot.use_mobility else 0
+    saved = bot.eval_weights
+    features = []
+    for name in WEIGHT_NAMES:
+        bot.eval_weights = {other: float(other == name) for other in WEIGHT_NAMES}
+        features.append(bot._positional_score(board, mobility, in_check))
+    bot.eval_weights = saved
+    return features
+
+
+def load_dataset(path: str, bot: MinMaxBot, limit: int = None) -> tuple:
+    """Матрица признаков (N, 6*64 + число весов) и вектор результатов (N,).
+
+    Признак поля фигуры = есть ли там белая фигура минус есть ли черная
+    на отраженном поле, поэтому оценка линейна по таблицам и весам.
+    """
+    masks, positional, results = [], [], []
+    for board, result in read_positions(path):
+        if board.is_game_over() or board.is_insufficient_material():
+            continue
+        masks.append(NumpyEvaluator.masks(board))
+        positional.append(positional_features(bot, board))
+        results.append(result)
+        if limit is not None and len(results) >= limit:
+            break
+
+    bits = NumpyEvaluator.unpack(np.array(masks, dtype=np.uint64).reshape(-1, 12)).astype(np.float32)
+    mirror = [chess.square_mirror(square) for square in chess.SQUARES]
+    pst_features = bits[:, 0::2, :] - bits[:, 1::2, :][:, :, mirror]
+    features = np.concatenate([pst_features.reshape(len(results), -1),
+                               np.array(positional, dtype=np.float32).reshape(len(results), -1)], axis=1)
+    return features, np.array(results, dtype=np.float32)
+
+
+def initial_params(bot: MinMaxBot) -> np.ndarray:
+    """Текущие веса бота одним вектором в порядке столбцов признаков"""
+    pst = [bot.eval_state.pst[piece_type] for piece_type in chess.PIECE_TYPES]
+    weights = [bot.eval_weights[name] for name in WEIGHT_NAMES]
+    return np.concatenate([np.array(pst, dtype=np.float64).ravel(), np.array(weights, dtype=np.float64)])
+
+
+def sigmoid(scores: np.ndarray, k: float) -> np.ndarray:
+    """Ожидаемый результат для белых по оценке в сантипешках"""
+    return 1.0 / (1.0 + 10.0 ** (-k * scores / 400.0))
+
+
+def loss(features: np.ndarray, results: np.ndarray, params: np.ndarray, k: float) -> float:
+    return float(np.mean((results - sigmoid(features @ params, k)) ** 2))
+
+
+def fit_k(features: np.ndarray, results: np.ndarray, params: np.ndarray) -> float:
+    """Масштаб сигмоиды, лучше всего согласующий текущую оценку с результатами"""
+    scores = features @ params
+    candidates = np.linspace(0.1, 3.0, 59)
+    losses = [np.mean((results - sigmoid(scores, k)) ** 2) for k in candidates]
+    return float(candidates[int(np.argmin(losses))])
+
+
+def tune(features: np.ndarray, results: np.ndarray, params: np.ndarray, k: float,
+         epochs: int = 500, learning_rate: float = 1.0, batch_size: int = None) -> np.ndarray:
+    """Градиентный спуск (Adam) по среднеквадратичной ошибке сигмоиды"""
+    params = params.astype(np.float64).copy()
+    moment = np.zeros_like(params)
+    velocity = np.zeros_like(params)
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    scale = k * np.log(10.0) / 400.0
+    count = len(results)
+    batch_size = batch_size or count
+    rng = np.random.default_rng(0)
+    step = 0
+
+    for epoch in range(1, epochs + 1):
+        order = rng.permutation(count) if batch_size < count else np.arange(count)
+        for start in range(0, count, batch_size):
+            batch = order[start:start + batch_size]
+            x, y = features[batch], results[batch]
+            predicted = sigmoid(x @ params, k)
+            # d/dw (y - p)^2 = -2 (y - p) p (1 - p) * scale * x
+            gradient = x.T @ (-2.0 * (y - predicted) * predicted * (1.0 - predicted) * scale) / len(batch)
+            moment = beta1 * moment + (1 - beta1) * gradient
+            velocity = beta2 * velocity + (1 - beta2) * gradient ** 2
+            step += 1
+            params -= (learning_rate * (moment / (1 - beta1 ** step)) /
+                       (np.sqrt(velocity / (1 - beta2 ** step)) + epsilon))
+        if epoch % 50 == 0 or epoch == epochs:
+            print(f"Эпоха {epoch:4d}: ошибка {loss(features, results, params, k):.6f}")
+    return params
+
+
+def save_params(params: np.ndarray, path: str):
+    """Записать веса в формате MinMaxBot.load_params (целые: поиск считает
+    оценки целыми числами)"""
+    pst = np.rint(params[:6 * 64]).astype(int).reshape(6, 64)
+    weights = np.rint(params[6 * 64:]).astype(int)
+    data = {
+        'pst': {chess.piece_name(piece_type): pst[piece_type - 1].tolist() for piece_type in chess.PIECE_TYPES},
+        'weights': {name: int(value) for name, value in zip(WEIGHT_NAMES, weights)},
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Настройка весов оценки по методу Texel')
+    parser.add_argument('positions', help='Позиции: строки "FEN результат" или файл .pgn')
+    parser.add_argument('--output', default=DEFAULT_PARAMS, help='Куда записать веса')
+    parser.add_argument('--epochs', type=int, default=500, help='Число эпох')
+    parser.add_argument('--lr', type=float, default=1.0, help='Шаг Adam (в сантипешках)')
+    parser.add_argument('--batch', type=int, default=None, help='Размер мини-пакета (по умолчанию - весь набор)')
+    parser.add_argument('--limit', type=int, default=None, help='Максимум позиций')
+    parser.add_argument('--k', type=float, default=None, help='Масштаб сигмоиды (по умолчанию подбирается)')
+
+    args = parser.parse_args()
+
+    # Настройка начинается с текущих весов бота (включая уже настроенные)
+    bot = MinMaxBot(hash_mb=0)
+    start = time.time()
+    features, results = load_dataset(args.positions, bot, args.limit)
+    print(f"Позиций: {len(results)}, признаков: {features.shape[1]} ({time.time() - start:.1f} с)")
+
+    params = initial_params(bot)
+    k = args.k if args.k is not None else fit_k(features, results, params)
+    print(f"K = {k:.2f}, ошибка до настройки {loss(features, results, params, k):.6f}")
+
+    params = tune(features, results, params, k, args.epochs, args.lr, args.batch)
+    save_params(params, args.output)
+    print(f"Веса записаны в {args.output}")
\ No newline at end of file
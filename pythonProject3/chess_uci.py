@@ -0,0 +1,234 @@
+import sys
+import threading
+import time
+
+import chess
+
+from bot_for_chess import MATE_BOUND, MATE_SCORE, MinMaxBot, default_book_path
+
+# Запас на задержки ввода-вывода и проверку лимита раз в 1024 узла, мс
+MOVE_OVERHEAD = 50
+# Сколько ходов до конца партии считать, если GUI не прислал movestogo
+DEFAULT_MOVES_TO_GO = 30
+
+
+class UciEngine:
+    """UCI-обертка над MinMaxBot: команды из stdin, ответы в stdout.
+
+    Поиск идет в отдельном потоке, чтобы во время него принимать stop и
+    ponderhit. В режимах go ponder и go infinite bestmove отправляется
+    только после stop или ponderhit, как требует протокол.
+    """
+
+    def __init__(self):
+        self.bot = MinMaxBot(book_path=default_book_path())
+        self.bot.on_iteration = self.send_info
+        self.board = chess.Board()
+        # Поиск еще идет (снимается потоком поиска под lock): stop() бота
+        # без поиска в работе прервал бы следующий
+        self.searching = False
+        self.lock = threading.Lock()
+        # Установлен - можно отдавать bestmove (снят на время ponder/infinite)
+        self.release = threading.Event()
+        self.search_thread = None
+        self.search_start = 0.0
+        self.tb_hits_start = 0
+        self.ponder_time = None
+        self.timer = None
+
+    def send(self, line: str):
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    def send_info(self, depth: int, score: float, pv: list):
+        elapsed = time.time() - self.search_start
+        if abs(score) >= MATE_BOUND:
+            # Ходы (не полуходы) до мата; отрицательные - мат нам
+            moves = (MATE_SCORE - abs(score) + 1) // 2
+            score_text = f"mate {int(moves if score > 0 else -moves)}"
+        else:
+            score_text = f"cp {int(score)}"
+        nps = int(self.bot.nodes / elapsed) if elapsed > 0 else 0
+        tablebase = self.bot.tablebase
+        tb_hits = f"tbhits {tablebase.hits - self.tb_hits_start} " if tablebase is not None else ""
+        self.send(f"info depth {depth} score {score_text} nodes {self.bot.nodes} nps {nps} {tb_hits}"
+                  f"time {int(elapsed * 1000)} pv {' '.join(move.uci() for move in pv)}")
+
+    def time_budget(self, params: dict):
+        """Время на ход в секундах: 0 - без лимита, None - лимит бота по умолчанию"""
+        if 'movetime' in params:
+            return max(params['movetime'] - MOVE_OVERHEAD, 1) / 1000
+        clock = params.get('wtime' if self.board.turn == chess.WHITE else 'btime')
+        if clock is None:
+            return 0 if 'depth' in params or 'nodes' in params else None
+        increment = params.get('winc' if self.board.turn == chess.WHITE else 'binc', 0)
+        moves_to_go = params.get('movestogo', DEFAULT_MOVES_TO_GO)
+        budget = clock / moves_to_go + increment * 0.8
+        # Никогда не тратить больше половины оставшегося времени
+        budget = min(budget, clock / 2) - MOVE_OVERHEAD
+        return max(budget, 1) / 1000
+
+    def position(self, tokens: list):
+        if 'moves' in tokens:
+            index = tokens.index('moves')
+            setup, moves = tokens[:index], tokens[index + 1:]
+        else:
+            setup, moves = tokens, []
+        try:
+            board = chess.Board(' '.join(setup[1:])) if setup and setup[0] == 'fen' else chess.Board()
+        except ValueError as e:
+            # Позиция остается прежней
+            self.send(f"info string Неверный FEN: {e}")
+            return
+        for uci in moves:
+            try:
+                board.push_uci(uci)
+            except ValueError:
+                self.send(f"info string Неверный ход {uci}: он и следующие ходы пропущены")
+                break
+        self.board = board
+
+    def go(self, tokens: list):
+        self.stop()
+        params = {}
+        for name, value in zip(tokens, tokens[1:]):
+            if name in ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes'):
+                params[name] = int(value)
+        waiting = 'ponder' in tokens or 'infinite' in tokens
+        time_limit = self.time_budget(params)
+        if 'infinite' in tokens:
+            time_limit = 0
+
+        if waiting:
+            # Ищем без лимита до ponderhit/stop; бюджет понадобится после ponderhit
+            self.ponder_time = time_limit
+            self.release.clear()
+            search_time = 0
+        else:
+            self.release.set()
+            search_time = time_limit
+
+        self.search_start = time.time()
+        tablebase = self.bot.tablebase
+        self.tb_hits_start = tablebase.hits if tablebase is not None else 0
+        self.searching = True
+        self.search_thread = threading.Thread(
+            target=self._search,
+            args=(self.board.copy(), search_time, params.get('nodes'), params.get('depth')),
+            daemon=True)
+        self.search_thread.start()
+
+    def _search(self, board: chess.Board, time_limit: float, max_nodes: int, max_depth: int):
+        move = None
+        try:
+            # В мате или пате ходов нет: GUI все равно ждет bestmove
+            if any(board.generate_legal_moves()):
+                move = self.bot.get_move(board, time_limit=time_limit, max_nodes=max_nodes,
+                                         max_depth=max_depth)
+        except Exception as e:
+            self.send(f"info string Ошибка поиска: {e}")
+        finally:
+            with self.lock:
+                self.searching = False
+        if move is not None and self.bot.threads > 1 and self.bot.last_depth:
+            # Итерации Lazy SMP идут в других процессах: сообщаем только итог
+            self.send_info(self.bot.last_depth, self.bot.last_score, self.bot.last_pv)
+        self.release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        pv = self.bot.last_pv
+        if len(pv) > 1 and pv[0] == move:
+            self.send(f"bestmove {move.uci()} ponder {pv[1].uci()}")
+        else:
+            self.send(f"bestmove {move.uci()}")
+
+    def _stop_search(self):
+        with self.lock:
+            if self.searching:
+                self.bot.stop()
+
+    def ponderhit(self):
+        """Соперник сыграл ожидаемый ход: поиск продолжается, но уже по часам"""
+        if self.search_thread is None or not self.search_thread.is_alive():
+            self.release.set()
+            return
+        budget = self.bot.time_limit if self.ponder_time is None else self.ponder_time
+        if budget:
+            self.timer = threading.Timer(budget, self._stop_search)
+            self.timer.start()
+        self.release.set()
+
+    def stop(self):
+        self._stop_search()
+        self.release.set()
+        self.wait()
+
+    def wait(self):
+        """Дождаться конца текущего поиска"""
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def setoption(self, tokens: list):
+        if 'name' not in tokens:
+            return
+        value_index = tokens.index('value') if 'value' in tokens else len(tokens)
+        name = ' '.join(tokens[tokens.index('name') + 1:value_index]).lower()
+        value = ' '.join(tokens[value_index + 1:])
+        if name == 'hash':
+            self.bot.set_hash(int(value))
+        elif name == 'threads':
+            self.bot.set_threads(int(value))
+        elif name == 'syzygypath':
+            self.bot.set_syzygy_path('' if value == '<empty>' else value)
+
+    def handle(self, command: str, args: list) -> bool:
+        """Выполнить одну команду; False - пора выходить"""
+        if command == 'uci':
+            self.send("id name MinMaxBot")
+            self.send("id author cloud-storage")
+            self.send(f"option name Hash type spin default {int(self.bot.tt.size_mb)} min 1 max 4096")
+            self.send(f"option name Threads type spin default {self.bot.threads} min 1 max 64")
+            self.send("option name Ponder type check default false")
+            self.send("option name SyzygyPath type string default <empty>")
+            self.send("uciok")
+        elif command == 'isready':
+            self.send("readyok")
+        elif command == 'ucinewgame':
+            self.stop()
+            self.bot.new_game()
+        elif command == 'setoption':
+            self.stop()
+            self.setoption(args)
+        elif command == 'position':
+            self.position(args)
+        elif command == 'go':
+            self.go(args)
+        elif command == 'stop':
+            self.stop()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            return False
+        return True
+
+    def loop(self):
+        for line in sys.stdin:
+            tokens = line.split()
+            if not tokens:
+                continue
+            try:
+                if not self.handle(tokens[0], tokens[1:]):
+                    break
+            except (ValueError, OSError) as e:
+                # Неверное число в go/setoption, нет папки таблиц и т.п.: движок продолжает работу
+                self.send(f"info string Ошибка в команде '{line.strip()}': {e}")
+        self.stop()
+        self.bot.close()
+
+if __name__ == "__main__":
+    UciEngine().loop()
\ No newline at end of file
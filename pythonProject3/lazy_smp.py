@@ -0,0 +1,217 @@
+import multiprocessing
+import queue
+import random
+import struct
+import weakref
+from multiprocessing import shared_memory
+
+import chess
+
+from bot_for_chess import MinMaxBot, TranspositionTable
+
+MASK64 = (1 << 64) - 1
+FILLED = 1 << 63
+# Как часто ждущий результатов процесс проверяет сигнал остановки, с
+RESULT_POLL = 0.05
+
+
+class WorkerError(RuntimeError):
+    """Процесс-помощник умер: результатов от него не будет"""
+
+
+def encode_move(move) -> int:
+    if move is None:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code: int):
+    if not code:
+        return None
+    return chess.Move(code & 63, code >> 6 & 63, code >> 12 or None)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Таблица транспозиций в разделяемой памяти, общая для процессов Lazy SMP.
+
+    Запись идет без блокировок: в ячейке хранится ключ, сложенный по XOR
+    с данными, поэтому ячейку, испорченную одновременной записью двух
+    процессов, проба просто не узнает.
+    """
+
+    # Проверочный ключ, упакованные depth/flag/move/age и оценка
+    SLOT = struct.Struct('<QQd')
+    ENTRY_BYTES = SLOT.size
+
+    def __init__(self, size_mb: float = 16, name: str = None):
+        self._open(size_mb, name)
+
+    def _open(self, size_mb: float, name: str = None):
+        """Создать блок памяти (name=None) или подключиться к созданному другим процессом"""
+        self.size_mb = size_mb
+        self.buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        self.owner = name is None
+        size = self.buckets * 2 * self.ENTRY_BYTES
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.buf = self.shm.buf
+        self.age = 0
+        self.reset_counters()
+        if self.owner:
+            self.clear()
+
+    def resize(self, size_mb: float):
+        """Новая пустая таблица в новом блоке памяти; этот процесс - ее владелец.
+
+        Процессы, подключенные к старому блоку, его не увидят: их нужно
+        подключить заново по shm.name (LazySMP для этого пересоздается).
+        """
+        self.close()
+        self._open(size_mb)
+
+    def clear(self):
+        size = self.buckets * 2 * self.ENTRY_BYTES
+        self.buf[:size] = bytes(size)
+        self.age = 0
+        self.reset_counters()
+
+    def new_search(self):
+        # Поколение ведет только процесс-владелец и передает его помощникам
+        if self.owner:
+            self.age += 1
+
+    def probe(self, key: int):
+        offset = key % self.buckets * 2 * self.ENTRY_BYTES
+        occupied = False
+        for slot_offset in (offset, offset + self.ENTRY_BYTES):
+            check, meta, score = self.SLOT.unpack_from(self.buf, slot_offset)
+            if not meta:
+                continue
+            occupied = True
+            if check ^ meta ^ (hash(score) & MASK64) == key:
+                self.hits += 1
+                return (key, meta & 0xFFFF, score, meta >> 16 & 3, decode_move(meta >> 18 & 0xFFFF),
+                        meta >> 34 & 0xFFFF)
+        self.misses += 1
+        if occupied:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, flag: int, move):
+        offset = key % self.buckets * 2 * self.ENTRY_BYTES
+        age = self.age & 0xFFFF
+        deep_meta = self.SLOT.unpack_from(self.buf, offset)[1]
+        if deep_meta and depth < (deep_meta & 0xFFFF) and (deep_meta >> 34 & 0xFFFF) == age:
+            offset += self.ENTRY_BYTES
+        meta = FILLED | depth | flag << 16 | encode_move(move) << 18 | age << 34
+        self.SLOT.pack_into(self.buf, offset, key ^ meta ^ (hash(score) & MASK64), meta, score)
+
+    def close(self):
+        self.buf.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker(index: int, table_name: str, hash_mb: float, tasks, results, stop_event, options: dict):
+    """Процесс-помощник: свой MinMaxBot поверх общей таблицы"""
+    random.seed(index)
+    bot = MinMaxBot(hash_mb=0, **options)
+    bot.tt = SharedTranspositionTable(hash_mb, name=table_name)
+    bot._stop_event = stop_event
+    # Половина помощников начинает на полуход глубже, все кроме первого
+    # немного перемешивают тихие ходы
+    bot.depth_offset = index % 2
+    bot.order_noise = 32 if index else 0
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        board, time_limit, max_nodes, max_depth, age = task
+        bot.tt.age = age
+        move = bot.get_move(board, time_limit=time_limit, max_nodes=max_nodes, max_depth=max_depth)
+        results.put((index, bot.last_depth, bot.last_score, move.uci(),
+                     [pv_move.uci() for pv_move in bot.last_pv], bot.nodes))
+    bot.tt.close()
+
+
+class LazySMP:
+    """Параллельный поиск Lazy SMP: N процессов ищут один и тот же корень,
+    обмениваясь результатами через общую таблицу транспозиций"""
+
+    def __init__(self, threads: int, hash_mb: float = 16, options: dict = None):
+        self.threads = threads
+        self.table = SharedTranspositionTable(hash_mb)
+        # spawn, а не fork: процесс с другими потоками (UCI читает stdin, сервер
+        # обслуживает клиентов) форкается с чужими блокировками, и помощник
+        # зависает еще при запуске
+        context = multiprocessing.get_context('spawn')
+        self.stop_event = context.Event()
+        self.results = context.Queue()
+        self.tasks = [context.Queue() for _ in range(threads)]
+        self.workers = []
+        for index in range(threads):
+            worker = context.Process(
+                target=_worker,
+                args=(index, self.table.shm.name, hash_mb, self.tasks[index], self.results,
+                      self.stop_event, options or {}),
+                daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        self._finalizer = weakref.finalize(self, LazySMP._shutdown, self.tasks, self.workers, self.table)
+
+    def search(self, board: chess.Board, time_limit: float = None, max_nodes: int = None,
+               max_depth: int = 64, cancel=None) -> dict:
+        """Запустить всех помощников и дождаться их результатов.
+
+        cancel - threading.Event вызывающего: установленный (в том числе до
+        начала поиска) останавливает помощников.
+        """
+        self.table.new_search()
+        self.stop_event.clear()
+        # Бюджет узлов делится между процессами
+        worker_nodes = max(1, max_nodes // self.threads) if max_nodes else None
+        for tasks in self.tasks:
+            tasks.put((board, time_limit, worker_nodes, max_depth, self.table.age))
+
+        results = []
+        while len(results) < self.threads:
+            if cancel is not None and cancel.is_set():
+                self.stop_event.set()
+            try:
+                result = self.results.get(timeout=RESULT_POLL)
+            except queue.Empty:
+                result = None
+            if result is None:
+                # Умерший помощник результата не пришлет: не ждать его вечно
+                dead = [worker.exitcode for worker in self.workers if not worker.is_alive()]
+                if dead:
+                    raise WorkerError(f"Процесс Lazy SMP завершился (код {dead[0]})")
+                continue
+            results.append(result)
+            # Первый закончивший останавливает остальных: они вернут
+            # последнюю завершенную итерацию
+            self.stop_event.set()
+
+        # Самая глубокая итерация; при равенстве - процесс с меньшим номером
+        index, depth, score, move, pv, _ = max(results, key=lambda result: (result[1], -result[0]))
+        return {
+            'move': chess.Move.from_uci(move),
+            'depth': depth,
+            'score': score,
+            'pv': [chess.Move.from_uci(pv_move) for pv_move in pv],
+            'nodes': sum(result[5] for result in results),
+            'worker': index,
+        }
+
+    @staticmethod
+    def _shutdown(tasks, workers, table):
+        for task_queue in tasks:
+            task_queue.put(None)
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+        table.close()
+
+    def close(self):
+        self._finalizer()
\ No newline at end of file
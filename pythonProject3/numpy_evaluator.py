@@ -0,0 +1,53 @@
+import chess
+import numpy as np
+
+
+class NumpyEvaluator:
+    """Материал и таблицы фигура-поле через NumPy по битбордам python-chess.
+
+    Таблицы задаются с точки зрения белых; для черных поле отражается.
+    Оценка - с точки зрения белых, как в MinMaxBot.evaluate_position.
+    """
+
+    def __init__(self, pst: dict):
+        # Строки весов: для каждой фигуры сначала белые, потом черные
+        mirror = [chess.square_mirror(square) for square in chess.SQUARES]
+        rows = []
+        for piece_type in chess.PIECE_TYPES:
+            table = np.asarray(pst[piece_type], dtype=np.float64)
+            rows.append(table)
+            rows.append(-table[mirror])
+        self.weights = np.stack(rows)
+
+    @classmethod
+    def from_bot(cls, bot) -> 'NumpyEvaluator':
+        """Взять таблицы (материал + бонус за центр) из MinMaxBot"""
+        return cls(bot.eval_state.pst)
+
+    @staticmethod
+    def masks(board: chess.Board) -> list:
+        """12 битбордов: (пешки белых, пешки черных, кони белых, ...)"""
+        return [board.pieces_mask(piece_type, color)
+                for piece_type in chess.PIECE_TYPES
+                for color in (chess.WHITE, chess.BLACK)]
+
+    @staticmethod
+    def unpack(masks: np.ndarray) -> np.ndarray:
+        """Битборды (..., 12) uint64 -> массив (..., 12, 64) из нулей и единиц"""
+        masks = np.ascontiguousarray(masks, dtype='<u8')
+        bits = np.unpackbits(masks.view(np.uint8).reshape(masks.shape + (8,)), axis=-1, bitorder='little')
+        return bits.reshape(masks.shape + (64,))
+
+    def features(self, boards) -> np.ndarray:
+        """Признаки для набора позиций: массив (N, 12, 64)"""
+        masks = np.array([self.masks(board) for board in boards], dtype=np.uint64).reshape(-1, 12)
+        return self.unpack(masks)
+
+    def evaluate(self, board: chess.Board) -> float:
+        """Оценка одной позиции: по скалярному произведению на каждый тип фигуры"""
+        bits = self.unpack(np.array(self.masks(board), dtype=np.uint64))
+        return float(np.einsum('pk,pk->', bits, self.weights))
+
+    def evaluate_batch(self, boards) -> np.ndarray:
+        """Оценки сразу для многих позиций (пакетный анализ, настройка весов)"""
+        return np.einsum('npk,pk->n', self.features(boards), self.weights)
\ No newline at end of file
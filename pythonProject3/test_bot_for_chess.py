@@ -0,0 +1,267 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import chess
+import chess.polyglot
+import pytest
+
+from bot_for_chess import EXACT, EvalState, MinMaxBot, pawn_terms, see
+
+
+def random_games(games: int, plies: int, seed: int = 0):
+    """Случайные партии: списки ходов от начальной позиции"""
+    rng = random.Random(seed)
+    for _ in range(games):
+        board = chess.Board()
+        moves = []
+        for _ in range(plies):
+            legal_moves = list(board.legal_moves)
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            moves.append(move)
+            board.push(move)
+        yield moves
+
+
+def test_incremental_zobrist_matches_polyglot():
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    for moves in random_games(40, 120):
+        board = chess.Board()
+        bot._set_root(board)
+        for move in moves:
+            bot._push(board, move)
+            assert bot._keys[-1] == chess.polyglot.zobrist_hash(board), board.fen()
+        # Отмена ходов возвращает ключи назад
+        while board.move_stack:
+            bot._pop(board)
+            assert bot._keys[-1] == chess.polyglot.zobrist_hash(board), board.fen()
+
+
+def test_transposition_table_store_probe():
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    key = chess.polyglot.zobrist_hash(chess.Board())
+    move = chess.Move.from_uci('e2e4')
+    bot.tt.store(key, 5, 30, EXACT, move)
+    assert bot.tt.probe(key)[1:5] == (5, 30, EXACT, move)
+    assert bot.tt.probe(key ^ 1) is None
+    bot.tt.clear()
+    assert bot.tt.probe(key) is None
+
+
+@pytest.mark.parametrize('tuned', [False, True])
+def test_incremental_eval_matches_full_recompute(tuned):
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    if tuned:
+        # Несимметричные таблицы ловят ошибки отражения полей для черных
+        rng = random.Random(1)
+        pst = {piece_type: [rng.randint(-50, 50) + value for _ in chess.SQUARES]
+               for piece_type, value in bot.piece_values.items()}
+        bot.eval_state = EvalState(bot.piece_values, pst)
+
+    for moves in random_games(40, 120):
+        board = chess.Board()
+        bot._set_root(board)
+        for move in moves:
+            bot._push(board, move)
+            assert bot.eval_state.score == bot.eval_state.full_score(board), board.fen()
+        while board.move_stack:
+            bot._pop(board)
+            assert bot.eval_state.score == bot.eval_state.full_score(board), board.fen()
+
+
+@pytest.mark.parametrize('fen, uci, expected', [
+    # Незащищенная пешка
+    ('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1', 'e1e5', 100),
+    # Конь за защищенную пешку
+    ('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1', 'd3e5', -220),
+    # Пешка за пешку
+    ('4k3/8/2p5/3p4/4P3/8/8/4K3 w - - 0 1', 'e4d5', 0),
+    # Взятие на проходе
+    ('4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1', 'e5d6', 100),
+    # Превращение
+    ('4k3/1P6/8/8/8/8/8/4K3 w - - 0 1', 'b7b8q', 800),
+    # Сдвоенные ладьи против сдвоенных: рентген с обеих сторон
+    ('3rk3/3r4/8/3q4/8/8/3R4/3RK3 w - - 0 1', 'd2d5', 400),
+    # Размен останавливается, когда продолжение невыгодно
+    ('3qk3/3r4/8/3r4/8/8/3R4/3QK3 w - - 0 1', 'd2d5', 0),
+])
+def test_see(fen, uci, expected):
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    assert see(chess.Board(fen), chess.Move.from_uci(uci), bot.piece_values) == expected
+
+
+ITALIAN = 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10'
+
+
+def test_analyse_multipv_lines():
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    board = chess.Board(ITALIAN)
+    results = list(bot.analyse(board, multipv=3, time_limit=0, max_depth=3))
+    assert [result['depth'] for result in results] == [1, 2, 3]
+
+    lines = results[-1]['lines']
+    assert len(lines) == 3
+    assert len({line['move'] for line in lines}) == 3
+    scores = [line['score'] for line in lines]
+    assert scores == sorted(scores, reverse=True)
+    for line in lines:
+        assert line['pv'][0] == line['move']
+        replay = board.copy()
+        for move in line['pv']:
+            assert replay.is_legal(move)
+            replay.push(move)
+
+
+def test_analyse_stores_only_first_line_at_root():
+    bot = MinMaxBot(hash_mb=1, params_path='')
+    board = chess.Board(ITALIAN)
+    lines = list(bot.analyse(board, multipv=3, time_limit=0, max_depth=3))[-1]['lines']
+    # Варианты 2 и 3 искались без лучших ходов: их оценка корня была бы неверной
+    _, depth, score, flag, move, _ = bot.tt.probe(bot.zobrist(board))
+    assert (depth, score, flag, move) == (3, lines[0]['score'], EXACT, lines[0]['move'])
+
+
+
+def test_cache_not_shared_between_weights(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    board = chess.Board(ITALIAN)
+    bot = MinMaxBot(hash_mb=1, params_path='', cache_path=path)
+    move = bot.get_move(board, time_limit=0, max_depth=3)
+    assert bot.cache.probe(bot.search_fingerprint(), bot.zobrist(board))[3] == move
+    assert bot._load_cache(board, 3) == move
+    bot.close()
+
+    other = MinMaxBot(hash_mb=1, params_path='', cache_path=path)
+    other.eval_weights['mobility'] += 5
+    assert other.search_fingerprint() != bot.search_fingerprint()
+    assert other.cache.probe(other.search_fingerprint(), other.zobrist(board)) is None
+    assert other._load_cache(board, 3) is None
+    other.close()
+
+    no_lmr = MinMaxBot(hash_mb=1, params_path='', cache_path=path, lmr=False)
+    assert no_lmr._load_cache(board, 3) is None
+    no_lmr.close()
+
+
+WARM_CHECK = """
+import chess
+from bot_for_chess import MinMaxBot
+bot = MinMaxBot(hash_mb=1, params_path='', cache_path={path!r})
+move = bot._load_cache(chess.Board({fen!r}), 3)
+print(move.uci() if move else '-')
+bot.close()
+"""
+
+
+def test_cache_warm_in_new_process(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    bot = MinMaxBot(hash_mb=1, params_path='', cache_path=path)
+    move = bot.get_move(chess.Board(ITALIAN), time_limit=0, max_depth=3)
+    bot.close()
+
+    result = subprocess.run([sys.executable, '-c', WARM_CHECK.format(path=path, fen=ITALIAN)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == move.uci()
+
+
+def test_ponder_hit_returns_ponder_move():
+    bot = MinMaxBot(hash_mb=1, params_path='', max_depth=3)
+    board = chess.Board(ITALIAN)
+    board.push(bot.get_move(board, time_limit=0))
+    expected = bot.last_pv[1]
+    assert bot.start_ponder(board)
+    bot._ponder_thread.join(30)
+    ponder_move = bot._ponder_move
+    assert ponder_move is not None
+
+    board.push(expected)
+    assert bot.get_move(board, time_limit=5) == ponder_move
+    assert (bot.ponder_hits, bot.ponder_misses) == (1, 0)
+
+
+def test_ponder_miss_searches_again():
+    bot = MinMaxBot(hash_mb=1, params_path='', max_depth=3)
+    board = chess.Board(ITALIAN)
+    board.push(bot.get_move(board, time_limit=0))
+    expected = bot.last_pv[1]
+    assert bot.start_ponder(board)
+
+    board.push(next(move for move in board.legal_moves if move != expected))
+    move = bot.get_move(board, time_limit=5)
+    assert board.is_legal(move)
+    assert (bot.ponder_hits, bot.ponder_misses) == (0, 1)
+    assert bot._ponder_thread is None
+
+
+
+def test_stop_interrupts_search_from_another_thread():
+    bot = MinMaxBot(hash_mb=1, params_path='', max_depth=64)
+    board = chess.Board(ITALIAN)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(bot.get_move(board, time_limit=0)))
+    thread.start()
+    time.sleep(0.3)
+    stopped = time.time()
+    bot.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.time() - stopped < 0.5
+    assert board.is_legal(result[0])
+    assert not bot._cancel.is_set()
+
+
+def test_stop_before_search_cancels_it():
+    bot = MinMaxBot(hash_mb=1, params_path='', max_depth=64)
+    board = chess.Board(ITALIAN)
+    bot.stop()
+    start = time.time()
+    assert board.is_legal(bot.get_move(board, time_limit=0))
+    assert time.time() - start < 1
+    # Флаг снят: следующий поиск идет до своих лимитов
+    assert not bot._cancel.is_set()
+    bot.get_move(board, time_limit=0, max_depth=3)
+    assert bot.last_depth == 3
+
+
+@pytest.mark.parametrize('time_limit', [0.01, 0.05])
+def test_hard_deadline_keeps_time_limit(time_limit):
+    bot = MinMaxBot(hash_mb=1, params_path='', max_depth=64, hard_deadline=True)
+    board = chess.Board(ITALIAN)
+    start = time.time()
+    move = bot.get_move(board, time_limit=time_limit)
+    assert time.time() - start < time_limit + 0.1
+    assert board.is_legal(move)
+
+
+
+def pawns(*names):
+    """Битборд пешек на полях names"""
+    return sum(chess.BB_SQUARES[chess.parse_square(name)] for name in names)
+
+
+@pytest.mark.parametrize('white, black, expected', [
+    # Начальная позиция симметрична
+    (chess.BB_RANK_2, chess.BB_RANK_7, (0, 0, 0)),
+    # Сдвоенные изолированные; проходная только передняя, на 3-й горизонтали
+    (pawns('a2', 'a3'), 0, (1, 2, 1)),
+    # Пешку e5 держит d7, пешку d7 - e5
+    (pawns('e5'), pawns('d7'), (0, 0, 0)),
+    # Проходная на 6-й (x5) против проходной черных на 7-й (x1)
+    (pawns('b6'), pawns('h7'), (0, 0, 4)),
+    # Связанные проходные на 5-й горизонтали
+    (pawns('d5', 'e5'), 0, (0, 0, 6)),
+    # Строенные черные пешки: две лишние; проходные c2, d2 (x1) против f5 (x2)
+    (pawns('c2', 'd2'), pawns('f7', 'f6', 'f5'), (-2, -3, 0)),
+])
+def test_pawn_terms(white, black, expected):
+    assert pawn_terms(white, black) == expected
+    # Зеркало цветов меняет знак
+    mirrored = pawn_terms(chess.flip_vertical(black), chess.flip_vertical(white))
+    assert mirrored == tuple(-term for term in expected)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+
+from chess_batch import completed_count, run_batch
+
+POSITIONS = [
+    'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1',
+    '6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1',
+    'not a position',
+    'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - id "italian";',
+    '8/8/8/4k3/8/8/3QK3/8 w - - 0 1',
+]
+
+
+def read_records(path) -> list:
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_completed_count_truncates_torn_line(tmp_path):
+    output = tmp_path / 'out.ndjson'
+    output.write_text('{"id": "a"}\n{"id": "b"}\n{"id": "c", "mo', encoding='utf-8')
+    assert completed_count(str(output)) == 2
+    assert output.read_text(encoding='utf-8') == '{"id": "a"}\n{"id": "b"}\n'
+    assert completed_count(str(tmp_path / 'missing.ndjson')) == 0
+
+
+def test_resume_after_torn_line(tmp_path):
+    positions = tmp_path / 'positions.epd'
+    positions.write_text('\n'.join(POSITIONS) + '\n', encoding='utf-8')
+    config = {'hash_mb': 1, 'params_path': ''}
+
+    full = tmp_path / 'full.ndjson'
+    assert run_batch([str(positions)], str(full), config, workers=1, time_limit=0, max_depth=2) == 5
+    expected = read_records(full)
+    assert [record['id'] for record in expected] == [
+        'positions.epd:1', 'positions.epd:2', 'positions.epd:3', 'italian', 'positions.epd:5']
+    assert 'error' in expected[2]
+    assert expected[1]['mate'] == 1
+
+    # Прерванный запуск: две записи и половина третьей
+    lines = full.read_text(encoding='utf-8').splitlines(keepends=True)
+    resumed = tmp_path / 'resumed.ndjson'
+    resumed.write_text(''.join(lines[:2]) + lines[2][:10], encoding='utf-8')
+    assert run_batch([str(positions)], str(resumed), config, workers=1, time_limit=0, max_depth=2) == 3
+
+    records = read_records(resumed)
+    assert [record['id'] for record in records] == [record['id'] for record in expected]
+    assert [record.get('move') for record in records] == [record.get('move') for record in expected]
\ No newline at end of file
@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+from chess_tournament import elo_from_score, elo_summary, expected_score, parse_config, sprt_llr
+
+
+@pytest.mark.parametrize('elo', [-400, -50, 0, 5, 120])
+def test_elo_score_inverse(elo):
+    assert elo_from_score(expected_score(elo)) == pytest.approx(elo)
+
+
+def test_expected_score():
+    assert expected_score(0) == 0.5
+    # 400 Эло - шансы 10 к 1
+    assert expected_score(400) == pytest.approx(10 / 11)
+
+
+def test_sprt_llr_sign_and_symmetry():
+    assert sprt_llr(60, 30, 10, 0, 5) > 0
+    assert sprt_llr(10, 30, 60, 0, 5) < 0
+    # Обмен побед и поражений с отражением гипотез LLR не меняет
+    assert sprt_llr(40, 35, 25, 0, 5) == pytest.approx(sprt_llr(25, 35, 40, 0, -5))
+
+
+def test_sprt_llr_value():
+    wins, draws, losses = 60, 20, 20
+    # score 0.7, дисперсия 0.65 - 0.49 = 0.16
+    score0, score1 = 0.5, expected_score(10)
+    expected = 100 * (score1 - score0) * (2 * 0.7 - score0 - score1) / (2 * 0.16)
+    assert sprt_llr(wins, draws, losses, 0, 10) == pytest.approx(expected)
+
+
+def test_sprt_llr_zero_variance():
+    assert sprt_llr(0, 20, 0, 0, 5) == 0.0
+    assert sprt_llr(20, 0, 0, 0, 5) == 0.0
+
+
+def test_elo_summary():
+    elo, margin = elo_summary(30, 40, 30)
+    assert elo == pytest.approx(0)
+    # Дисперсия (30 + 10) / 100 - 0.25 = 0.15
+    half = 1.96 * math.sqrt(0.15 / 100)
+    assert margin == pytest.approx((elo_from_score(0.5 + half) - elo_from_score(0.5 - half)) / 2)
+
+
+def test_parse_config():
+    assert parse_config(' lmr=False, hash_mb=32 ,name=abc') == {'lmr': False, 'hash_mb': 32, 'name': 'abc'}
+    assert parse_config('') == {}
\ No newline at end of file
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+
+import chess
+import pytest
+
+from chess_uci import DEFAULT_MOVES_TO_GO, MOVE_OVERHEAD, UciEngine
+
+
+@pytest.fixture(scope='module')
+def engine():
+    engine = UciEngine()
+    yield engine
+    engine.bot.close()
+
+
+def test_movetime(engine):
+    assert engine.time_budget({'movetime': 1000}) == pytest.approx((1000 - MOVE_OVERHEAD) / 1000)
+    assert engine.time_budget({'movetime': 10}) == pytest.approx(0.001)
+
+
+def test_clock_uses_side_to_move(engine):
+    engine.board = chess.Board()
+    params = {'wtime': 60000, 'btime': 3000, 'winc': 1000, 'binc': 0}
+    assert engine.time_budget(params) == pytest.approx((60000 / DEFAULT_MOVES_TO_GO + 800 - MOVE_OVERHEAD) / 1000)
+    engine.board.push_uci('e2e4')
+    assert engine.time_budget(params) == pytest.approx((3000 / DEFAULT_MOVES_TO_GO - MOVE_OVERHEAD) / 1000)
+
+
+def test_movestogo_never_spends_more_than_half(engine):
+    engine.board = chess.Board()
+    assert engine.time_budget({'wtime': 10000, 'movestogo': 1}) == pytest.approx((5000 - MOVE_OVERHEAD) / 1000)
+    assert engine.time_budget({'wtime': 40, 'movestogo': 1}) == pytest.approx(0.001)
+
+
+def test_no_clock(engine):
+    engine.board = chess.Board()
+    assert engine.time_budget({'depth': 5}) == 0
+    assert engine.time_budget({'nodes': 1000}) == 0
+    assert engine.time_budget({}) is None
+
+
+def test_position_with_moves(engine):
+    engine.position(['startpos', 'moves', 'e2e4', 'e7e5', 'g1f3'])
+    assert engine.board.fen() == 'rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2'
+    engine.position(['fen', '8/8/8/4k3/8/8/3QK3/8', 'w', '-', '-', '0', '1', 'moves', 'd2d4'])
+    assert engine.board.fen() == '8/8/8/4k3/3Q4/8/4K3/8 b - - 1 1'
+
+
+def run_engine(commands: list, timeout: float = 60) -> list:
+    """Прогнать команды через UciEngine.loop() в отдельном процессе (stdin/stdout - каналы)"""
+    process = subprocess.run([sys.executable, 'chess_uci.py'], input='\n'.join(commands) + '\n',
+                             capture_output=True, text=True, timeout=timeout,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert process.returncode == 0, process.stderr
+    return process.stdout.splitlines()
+
+
+def test_threads_search_over_pipe():
+    # Процессы Lazy SMP запускаются, пока главный поток ждет stdin
+    lines = run_engine(['uci', 'setoption name Threads value 2', 'isready', 'position startpos',
+                        'go movetime 500', 'isready', 'stop', 'quit'])
+    assert any(line.startswith('bestmove ') for line in lines)
+
+
+def test_no_legal_moves_answers_null_move():
+    lines = run_engine(['position fen 7k/5QQ1/8/8/8/8/8/K7 b - - 0 1', 'go depth 3', 'isready', 'quit'])
+    assert 'bestmove 0000' in lines
+
+
+def test_bad_input_does_not_end_engine(engine):
+    # Неверный ход: позиция до него принимается, остальные ходы пропускаются
+    engine.position(['startpos', 'moves', 'e2e4', 'e2e4', 'd7d5'])
+    assert engine.board.move_stack == [chess.Move.from_uci('e2e4')]
+    engine.position(['fen', 'garbage'])
+    assert engine.board.move_stack == [chess.Move.from_uci('e2e4')]
+
+    lines = run_engine(['position startpos moves e2e4 e2e4', 'go depth x', 'position startpos',
+                        'go depth 2', 'isready', 'quit'])
+    assert any(line.startswith('bestmove ') and line != 'bestmove 0000' for line in lines)
\ No newline at end of file
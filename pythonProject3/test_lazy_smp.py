@@ -0,0 +1,77 @@
+import time
+
+import chess
+import pytest
+
+from bot_for_chess import EXACT, LOWER, UPPER, MinMaxBot
+from lazy_smp import SharedTranspositionTable, decode_move, encode_move
+
+
+@pytest.fixture
+def table():
+    table = SharedTranspositionTable(1)
+    yield table
+    table.close()
+
+
+@pytest.mark.parametrize('uci', ['e2e4', 'a7a8q', 'h2h1n', 'e1g1'])
+def test_move_round_trip(uci):
+    move = chess.Move.from_uci(uci)
+    assert decode_move(encode_move(move)) == move
+    assert decode_move(encode_move(None)) is None
+
+
+@pytest.mark.parametrize('depth, score, flag, uci', [
+    (0, 0.0, EXACT, None),
+    (7, -35.0, LOWER, 'g8f6'),
+    (64, 99990.0, UPPER, 'b2b1q'),
+    (1, -99990.0, EXACT, 'e8c8'),
+])
+def test_store_probe_round_trip(table, depth, score, flag, uci):
+    move = chess.Move.from_uci(uci) if uci else None
+    key = 0x9D39247E33776D41
+    table.new_search()
+    table.store(key, depth, score, flag, move)
+    assert table.probe(key) == (key, depth, score, flag, move, table.age)
+
+
+def test_attached_table_sees_owner_entries(table):
+    move = chess.Move.from_uci('d2d4')
+    table.store(12345, 3, 21.0, EXACT, move)
+    attached = SharedTranspositionTable(1, name=table.shm.name)
+    try:
+        assert attached.probe(12345)[1:5] == (3, 21.0, EXACT, move)
+    finally:
+        attached.close()
+
+
+def test_foreign_key_is_rejected(table):
+    # Та же корзина, другой ключ: проверочный XOR не совпадет
+    table.store(5, 3, 10.0, EXACT, None)
+    assert table.probe(5 + table.buckets) is None
+    assert table.collisions == 1
+
+
+def test_resize(table):
+    table.store(77, 2, 1.0, EXACT, None)
+    table.resize(2)
+    assert table.size_mb == 2 and table.owner
+    assert table.probe(77) is None
+    table.store(77, 2, 1.0, EXACT, None)
+    assert table.probe(77)[1] == 2
+
+
+def test_dead_worker_falls_back_to_local_search():
+    bot = MinMaxBot(threads=2, hash_mb=1, params_path='')
+    try:
+        board = chess.Board()
+        assert bot.get_move(board, time_limit=0.2) in board.legal_moves
+        bot._smp.workers[1].kill()
+        bot._smp.workers[1].join()
+        # Поиск не зависает в ожидании результата от умершего процесса
+        start = time.time()
+        assert bot.get_move(board, time_limit=0.3) in board.legal_moves
+        assert time.time() - start < 5
+        assert bot._smp is None
+    finally:
+        bot.close()
\ No newline at end of file